@@ -7,13 +7,14 @@ from .db_inserter import DatabaseInserter
 from .multi_table_inserter import MultiTableInserter
 
 from .config import PipelineConfig, config
+from .cache import DiskCache
 from .utils import (
-    setup_logging, retry_on_error, safe_json_dump, safe_json_load,
+    setup_logging, create_http_session, RateLimiter, retry_on_error, safe_json_dump, safe_json_load,
     format_timestamp, parse_rating, parse_votes, parse_metascore,
     extract_year_from_date, truncate_text, clean_filename,
     get_file_size_mb, create_backup, validate_movie_data,
     calculate_processing_time, print_progress_bar,
-    merge_movie_data, filter_movies_by_rating, sort_movies_by_rating
+    merge_movie_data, deduplicate_movies, filter_movies_by_rating, sort_movies_by_rating
 )
 
 from .scrappers.base_scraper import BaseScraper, HtmlScraper, PlaywrightScraper
@@ -32,7 +33,10 @@ __all__ = [
     'config',
     
     # Utilities
+    'DiskCache',
     'setup_logging',
+    'create_http_session',
+    'RateLimiter',
     'retry_on_error',
     'safe_json_dump',
     'safe_json_load',
@@ -49,6 +53,7 @@ __all__ = [
     'calculate_processing_time',
     'print_progress_bar',
     'merge_movie_data',
+    'deduplicate_movies',
     'filter_movies_by_rating',
     'sort_movies_by_rating',
     
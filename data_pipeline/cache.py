@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for the Movie Ratings Data Pipeline
+Stores JSON-serializable values in SQLite so reruns can skip repeated API calls
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+import orjson
+
+def make_request_key(url: str, params: Optional[Dict[str, Any]] = None,
+                     ignored_params: Iterable[str] = ('apikey', 'api_key')) -> str:
+    """Build a stable cache key from a URL and its query parameters (API keys excluded)"""
+    if not params:
+        return url
+
+    ignored = set(ignored_params)
+    query = urlencode(sorted((k, v) for k, v in params.items() if k not in ignored))
+    return f"{url}?{query}"
+
+class DiskCache:
+    """SQLite-backed key-value cache with per-entry expiry"""
+
+    def __init__(self, path: Path, default_ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.default_ttl = default_ttl
+
+        # Ensure directory exists
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection shared by all threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return default
+
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return default
+
+        return orjson.loads(value)
+
+    def set(self, key: str, value: Any, expire: Optional[float] = None):
+        """Store value under key; expire is a TTL in seconds (defaults to default_ttl)"""
+        ttl = expire if expire is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove key from the cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._conn.close()
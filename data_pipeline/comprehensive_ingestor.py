@@ -4,30 +4,80 @@ Comprehensive Movie Data Ingestion Pipeline
 Integrates TMDB, OMDb API, Metacritic, and Rotten Tomatoes data sources
 """
 
+import atexit
 import json
 import os
-import time
 import logging
+import queue
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+import orjson
+
+from .cache import DiskCache
+from .config import PipelineConfig
 from .ingestor import SimpleIngestor
 from .multi_table_inserter import MultiTableInserter
+from .utils import deduplicate_movies, extract_year_from_date, RateLimiter
 
 logger = logging.getLogger(__name__)
 
+def _cleanup_at_exit(ingestor_ref: weakref.ref):
+    """atexit hook that cleans up an ingestor if it is still alive"""
+    ingestor = ingestor_ref()
+    if ingestor is not None:
+        ingestor.cleanup()
+
 class ComprehensiveIngestor:
     """Comprehensive ingestor that integrates all movie data sources"""
     
-    def __init__(self, omdb_api_key: Optional[str] = None, headless: bool = True):
+    def __init__(self, omdb_api_key: Optional[str] = None, headless: bool = True, use_cache: bool = True):
         self.omdb_api_key = omdb_api_key or os.getenv('OMDB_API_KEY')
         if not self.omdb_api_key:
             raise ValueError("OMDb API key is required")
         
         # Initialize components
-        self.base_ingestor = SimpleIngestor(self.omdb_api_key)
+        self.base_ingestor = SimpleIngestor(self.omdb_api_key, use_cache=use_cache)
         self.multi_inserter = MultiTableInserter()
+        self.cache_dir = Path("data/cache")
+        
+        # Per-file checkpoints of already enhanced movies (for resuming after a crash)
+        self.checkpoint_dir = self.cache_dir / "checkpoints"
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Persistent scraper results keyed by (source, title, year), shared across runs
+        self.ratings_cache_ttl = 30 * 24 * 3600  # 30 days
+        self.ratings_miss_ttl = 24 * 3600  # Retry titles that were not found after 1 day
+        self.ratings_cache = DiskCache(self.cache_dir / "ratings.sqlite",
+                                       default_ttl=self.ratings_cache_ttl) if use_cache else None
+        
+        # Rate limiting (one token bucket per scraped site)
+        self.scraper_delay = PipelineConfig.RATE_LIMITS['scraper']  # Average seconds between requests to the same site
+        self.scraper_burst = 5  # Requests allowed back-to-back after an idle period
+        self.metacritic_limiter = RateLimiter(rate=1 / self.scraper_delay, capacity=self.scraper_burst)
+        self.rotten_tomatoes_limiter = RateLimiter(rate=1 / self.scraper_delay, capacity=self.scraper_burst)
+        
+        # Worker threads for the HTTP stages (OMDb + Metacritic)
+        self.max_workers = PipelineConfig.PROCESSING['max_workers']
+        self.prefetch_size = self.max_workers * 2  # Movies queued ahead of the Rotten Tomatoes stage
+        
+        # Take critic scores from OMDb when present instead of scraping (no user scores/counts then)
+        self.use_omdb_scores = PipelineConfig.PROCESSING['use_omdb_critic_scores']
+        
+        # Database inserts are buffered across files and flushed in large batches
+        self.insert_batch_size = 500
+        self._db_connection_ok = False
+        
+        # Resource shutdown callables, run in order by cleanup()
+        self._atexit_hook = None
+        self._cleanup_fns = [self.base_ingestor.close, self.multi_inserter.disconnect]
+        if self.ratings_cache is not None:
+            self._cleanup_fns.append(self.ratings_cache.close)
         
         # Initialize scrapers with error handling
         self.scrapers_available = False
@@ -39,6 +89,11 @@ class ComprehensiveIngestor:
             self.rotten_tomatoes_scraper = RottenTomatoesScraper(headless=headless)
             self.scrapers_available = True
             logger.info("Scrapers initialized successfully")
+            self._cleanup_fns += [self.metacritic_scraper.close, self.rotten_tomatoes_scraper.close]
+            
+            # One browser serves every file; make sure it is shut down even if the run aborts.
+            # The hook holds only a weak reference, so it does not keep this ingestor alive
+            self._atexit_hook = atexit.register(partial(_cleanup_at_exit, weakref.ref(self)))
         except Exception as e:
             logger.warning(f"Scrapers not available: {e}")
             logger.info("Continuing with OMDb API only")
@@ -50,110 +105,145 @@ class ComprehensiveIngestor:
             'metacritic_enhanced': 0,
             'rotten_tomatoes_enhanced': 0,
             'database_inserted': 0,
+            'scraper_skipped': 0,
             'errors': 0
         }
+        self._stats_lock = threading.Lock()
     
-    def enhance_with_metacritic(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Enhance movie with Metacritic data"""
-        if not self.scrapers_available:
+    def _increment_stat(self, name: str, amount: int = 1):
+        """Increment a statistics counter (safe to call from worker threads)"""
+        with self._stats_lock:
+            self.stats[name] += amount
+    
+    def _title_and_year(self, movie: Dict[str, Any]):
+        """Get the title and release year used to look a movie up on rating sites"""
+        movie_get = movie.get
+        title = movie_get('title') or movie_get('omdb_title')
+        # Fall back to the year from release_date if needed
+        year = movie_get('year') or extract_year_from_date(movie_get('release_date'))
+        return title, year
+    
+    def _get_ratings(self, source: str, scraper, limiter: RateLimiter,
+                     title: str, year: int) -> Optional[Dict[str, Any]]:
+        """Scrape ratings for a movie, memoized on disk (cache hits skip the rate limit; failed lookups are not cached)"""
+        key = f"{source}:{title.strip().lower()}:{year}"
+        if self.ratings_cache is not None:
+            cached = self.ratings_cache.get(key)
+            if cached is not None:
+                # An empty dict records a title the site did not have
+                return cached or None
+        
+        limiter.acquire()
+        data = scraper.get_ratings(title, year)
+        
+        # None means the fetch failed (throttling, outage, timeout) and is retried on the next run
+        if self.ratings_cache is not None and data is not None:
+            if data.get('critic_score') is not None:
+                self.ratings_cache.set(key, data)
+            else:
+                self.ratings_cache.set(key, {}, expire=self.ratings_miss_ttl)
+        return data
+    
+    def enhance_with_metacritic(self, movie: Dict[str, Any], enhanced_at: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance movie with Metacritic data (updates the movie dict in place; enhanced_at defaults to now)"""
+        if not self.scrapers_available or movie.get('metacritic_critic_score') is not None:
             return movie
             
         try:
-            title = movie.get('title') or movie.get('omdb_title')
-            year = movie.get('year')
-            
-            # Extract year from release_date if needed
-            if not year and movie.get('release_date'):
-                try:
-                    year = int(movie['release_date'][:4])
-                except (ValueError, TypeError):
-                    pass
-            
+            title, year = self._title_and_year(movie)
             if not title or not year:
                 return movie
             
             # Get ratings from Metacritic
-            metacritic_data = self.metacritic_scraper.get_ratings(title, year)
+            metacritic_data = self._get_ratings('metacritic', self.metacritic_scraper,
+                                                self.metacritic_limiter, title, year)
             
             if metacritic_data and metacritic_data.get('critic_score') is not None:
-                enhanced_movie = movie.copy()
-                enhanced_movie.update({
+                movie.update({
                     'metacritic_critic_score': metacritic_data.get('critic_score'),
                     'metacritic_critic_count': metacritic_data.get('critic_count'),
                     'metacritic_user_score': metacritic_data.get('user_score'),
                     'metacritic_user_count': metacritic_data.get('user_count'),
                     'metacritic_data_source': 'metacritic',
-                    'metacritic_enhanced_at': datetime.now().isoformat()
+                    'metacritic_enhanced_at': enhanced_at or datetime.now().isoformat()
                 })
                 
-                self.stats['metacritic_enhanced'] += 1
-                return enhanced_movie
+                self._increment_stat('metacritic_enhanced')
             
             return movie
             
         except Exception as e:
-            self.stats['errors'] += 1
-            logger.warning(f"Metacritic enhancement failed for {movie.get('title', 'Unknown')}: {e}")
+            self._increment_stat('errors')
+            logger.warning("Metacritic enhancement failed for %s: %s", movie.get('title', 'Unknown'), e)
             return movie
-        
-        finally:
-            time.sleep(1.0)  # Rate limiting
     
-    def enhance_with_rotten_tomatoes(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Enhance movie with Rotten Tomatoes data"""
-        if not self.scrapers_available:
+    def enhance_with_rotten_tomatoes(self, movie: Dict[str, Any], enhanced_at: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance movie with Rotten Tomatoes data (updates the movie dict in place; enhanced_at defaults to now)"""
+        if not self.scrapers_available or movie.get('rt_critic_score') is not None:
             return movie
             
         try:
-            title = movie.get('title') or movie.get('omdb_title')
-            year = movie.get('year')
-            
-            # Extract year from release_date if needed
-            if not year and movie.get('release_date'):
-                try:
-                    year = int(movie['release_date'][:4])
-                except (ValueError, TypeError):
-                    pass
-            
+            title, year = self._title_and_year(movie)
             if not title or not year:
                 return movie
             
             # Get ratings from Rotten Tomatoes
-            rt_data = self.rotten_tomatoes_scraper.get_ratings(title, year)
+            rt_data = self._get_ratings('rottentomatoes', self.rotten_tomatoes_scraper,
+                                        self.rotten_tomatoes_limiter, title, year)
             
             if rt_data and rt_data.get('critic_score') is not None:
-                enhanced_movie = movie.copy()
-                enhanced_movie.update({
+                movie.update({
                     'rt_critic_score': rt_data.get('critic_score'),
                     'rt_user_score': rt_data.get('user_score'),
                     'rt_user_count': rt_data.get('user_count'),
                     'rt_data_source': 'rottentomatoes',
-                    'rt_enhanced_at': datetime.now().isoformat()
+                    'rt_enhanced_at': enhanced_at or datetime.now().isoformat()
                 })
                 
-                self.stats['rotten_tomatoes_enhanced'] += 1
-                return enhanced_movie
+                self._increment_stat('rotten_tomatoes_enhanced')
             
             return movie
             
         except Exception as e:
-            self.stats['errors'] += 1
-            logger.warning(f"Rotten Tomatoes enhancement failed for {movie.get('title', 'Unknown')}: {e}")
+            self._increment_stat('errors')
+            logger.warning("Rotten Tomatoes enhancement failed for %s: %s", movie.get('title', 'Unknown'), e)
             return movie
+    
+    def _apply_omdb_scores(self, movie: Dict[str, Any], enhanced_at: Optional[str] = None):
+        """Fill Metacritic/Rotten Tomatoes critic scores from OMDb's Ratings so those scrapes are skipped"""
+        for rating in movie.get('omdb_ratings') or []:
+            source, value = rating.get('Source'), rating.get('Value') or ''
+            try:
+                if source == 'Metacritic':
+                    movie['metacritic_critic_score'] = float(value.split('/')[0])
+                    movie['metacritic_data_source'] = 'omdb'
+                    movie['metacritic_enhanced_at'] = enhanced_at or datetime.now().isoformat()
+                elif source == 'Rotten Tomatoes':
+                    movie['rt_critic_score'] = float(value.rstrip('%'))
+                    movie['rt_data_source'] = 'omdb'
+                    movie['rt_enhanced_at'] = enhanced_at or datetime.now().isoformat()
+                else:
+                    continue
+            except ValueError:
+                continue
+            self._increment_stat('scraper_skipped')
+    
+    def _enhance_http_sources(self, movie: Dict[str, Any], enhanced_at: Optional[str] = None) -> Dict[str, Any]:
+        """Run the plain-HTTP stages (OMDb, Metacritic); safe to call from worker threads"""
+        # Stage 1: OMDb enhancement (always available)
+        enhanced_movie = self.base_ingestor.enhance_movie(movie, enhanced_at=enhanced_at)
+        if enhanced_movie.get('omdb_title'):
+            self._increment_stat('omdb_enhanced')
+            if self.use_omdb_scores:
+                self._apply_omdb_scores(enhanced_movie, enhanced_at)
         
-        finally:
-            time.sleep(1.0)  # Rate limiting
+        # Stage 2: Metacritic enhancement (if available)
+        return self.enhance_with_metacritic(enhanced_movie, enhanced_at=enhanced_at)
     
     def process_movie_comprehensive(self, movie: Dict[str, Any]) -> Dict[str, Any]:
         """Process a single movie through all enhancement stages"""
         try:
-            # Stage 1: OMDb enhancement (always available)
-            enhanced_movie = self.base_ingestor.enhance_movie(movie)
-            if enhanced_movie.get('omdb_title'):
-                self.stats['omdb_enhanced'] += 1
-            
-            # Stage 2: Metacritic enhancement (if available)
-            enhanced_movie = self.enhance_with_metacritic(enhanced_movie)
+            enhanced_movie = self._enhance_http_sources(movie)
             
             # Stage 3: Rotten Tomatoes enhancement (if available)
             enhanced_movie = self.enhance_with_rotten_tomatoes(enhanced_movie)
@@ -161,14 +251,45 @@ class ComprehensiveIngestor:
             return enhanced_movie
             
         except Exception as e:
-            self.stats['errors'] += 1
-            logger.error(f"Comprehensive enhancement failed for {movie.get('title', 'Unknown')}: {e}")
+            self._increment_stat('errors')
+            logger.error("Comprehensive enhancement failed for %s: %s", movie.get('title', 'Unknown'), e)
             # Return the movie as-is if enhancement fails
             return movie
     
+    def _checkpoint_path(self, file_path: Path) -> Path:
+        """Get the checkpoint file for a TMDB file"""
+        return self.checkpoint_dir / f"{file_path.stem}.ndjson"
+    
+    def _load_checkpoint(self, checkpoint_path: Path) -> Dict[str, Dict[str, Any]]:
+        """Load movies enhanced by a previous interrupted run, keyed by IMDb ID"""
+        completed = {}
+        if not checkpoint_path.exists():
+            return completed
+        
+        with open(checkpoint_path, 'rb') as f:
+            for line in f:
+                try:
+                    movie = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Last line may be truncated if the previous run crashed mid-write
+                    continue
+                if movie.get('imdb_id'):
+                    completed[movie['imdb_id']] = movie
+        
+        if completed:
+            logger.info(f"Resuming from checkpoint {checkpoint_path.name}: {len(completed)} movies already enhanced")
+        return completed
+    
+    def clear_checkpoint(self, file_path: Path):
+        """Remove the checkpoint for a fully processed TMDB file"""
+        self._checkpoint_path(file_path).unlink(missing_ok=True)
+    
     def process_file_comprehensive(self, file_path: Path, max_movies: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Process a single TMDB file with comprehensive enhancement"""
-        movies = self.base_ingestor.load_tmdb_data(file_path)
+        """Process a single TMDB file with comprehensive enhancement, checkpointing each movie"""
+        loaded_movies = self.base_ingestor.load_tmdb_data(file_path)
+        movies = deduplicate_movies(loaded_movies)
+        if len(movies) < len(loaded_movies):
+            logger.info(f"Skipped {len(loaded_movies) - len(movies)} duplicate IMDb IDs in {file_path.name}")
         
         if max_movies:
             movies = movies[:max_movies]
@@ -176,31 +297,76 @@ class ComprehensiveIngestor:
         enhanced_movies = []
         total_movies = len(movies)
         
+        checkpoint_path = self._checkpoint_path(file_path)
+        completed = self._load_checkpoint(checkpoint_path)
+        
         print(f"   Processing {total_movies} movies...")
         
-        for i, movie in enumerate(movies):
-            try:
-                print(f"   Movie {i+1:3d}/{total_movies}: {movie.get('title', 'Unknown')}")
-                
-                # Add basic metadata
-                movie['data_source'] = 'tmdb'
-                movie['processed_at'] = datetime.now().isoformat()
-                
-                # Comprehensive enhancement
-                enhanced_movie = self.process_movie_comprehensive(movie)
-                enhanced_movies.append(enhanced_movie)
+        # One timestamp for the whole batch
+        batch_timestamp = datetime.now().isoformat()
+        
+        # Add basic metadata and skip movies enhanced before an interruption
+        pending = []
+        for movie in movies:
+            if movie.get('imdb_id') in completed:
+                continue
+            # Derive the year once here rather than in every enhancement stage
+            if not movie.get('year'):
+                movie['year'] = extract_year_from_date(movie.get('release_date'))
+            movie['data_source'] = 'tmdb'
+            movie['processed_at'] = batch_timestamp
+            pending.append(movie)
+        
+        # OMDb + Metacritic fan out to worker threads (producers); Rotten Tomatoes
+        # drives a Playwright browser bound to this thread, so it consumes here.
+        # Only a bounded window runs ahead so an interrupted run wastes few lookups.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                open(checkpoint_path, 'ab') as checkpoint:
+            futures = {}
+            queued = iter(pending)
+            
+            def submit_ahead():
+                while len(futures) < self.prefetch_size:
+                    next_movie = next(queued, None)
+                    if next_movie is None:
+                        return
+                    futures[id(next_movie)] = executor.submit(self._enhance_http_sources, next_movie,
+                                                              enhanced_at=batch_timestamp)
+            
+            for i, movie in enumerate(movies):
+                # Reuse movies enhanced before an interruption
+                if movie.get('imdb_id') in completed:
+                    enhanced_movies.append(completed[movie['imdb_id']])
+                    continue
                 
-                # Progress update
-                if (i + 1) % 10 == 0:
-                    print(f"      Processed {i+1}/{total_movies} movies")
+                submit_ahead()
+                future = futures.pop(id(movie))
                 
-            except Exception as e:
-                logger.error(f"Error processing movie {i+1}: {e}")
-                # Add the original movie to continue processing
-                enhanced_movies.append(movie)
-                self.stats['errors'] += 1
+                try:
+                    logger.debug("Movie %d/%d: %s", i + 1, total_movies, movie.get('title', 'Unknown'))
+                    
+                    # Comprehensive enhancement
+                    enhanced_movie = self.enhance_with_rotten_tomatoes(future.result(), enhanced_at=batch_timestamp)
+                    enhanced_movies.append(enhanced_movie)
+                    
+                    # Persist immediately so a crash does not lose finished work
+                    checkpoint.write(orjson.dumps(enhanced_movie, option=orjson.OPT_APPEND_NEWLINE))
+                    checkpoint.flush()
+                    
+                    # Progress update (one line per 10 movies rather than per movie)
+                    if (i + 1) % 10 == 0 or i + 1 == total_movies:
+                        stats = self.get_statistics()
+                        print(f"      Processed {i+1}/{total_movies} movies "
+                              f"(OMDb: {stats['omdb_enhanced']}, Metacritic: {stats['metacritic_enhanced']}, "
+                              f"RT: {stats['rotten_tomatoes_enhanced']}, Errors: {stats['errors']})")
+                    
+                except Exception as e:
+                    logger.error("Error processing movie %d: %s", i + 1, e)
+                    # Add the original movie to continue processing
+                    enhanced_movies.append(movie)
+                    self._increment_stat('errors')
         
-        self.stats['total_movies'] += len(enhanced_movies)
+        self._increment_stat('total_movies', len(enhanced_movies))
         return enhanced_movies
     
     def save_comprehensive_data(self, enhanced_movies: List[Dict[str, Any]], 
@@ -211,9 +377,12 @@ class ComprehensiveIngestor:
     def insert_to_database(self, enhanced_movies: List[Dict[str, Any]]) -> bool:
         """Insert enhanced movies into appropriate tables"""
         try:
-            if not self.multi_inserter.test_connection():
-                logger.error("Database connection test failed")
-                return False
+            # Only check the connection once per run
+            if not self._db_connection_ok:
+                if not self.multi_inserter.test_connection():
+                    logger.error("Database connection test failed")
+                    return False
+                self._db_connection_ok = True
             
             # Insert into all appropriate tables
             results = self.multi_inserter.insert_all_data(enhanced_movies)
@@ -221,19 +390,36 @@ class ComprehensiveIngestor:
             # Check results
             all_success = all(results.values())
             if all_success:
-                self.stats['database_inserted'] += len(enhanced_movies)
+                self._increment_stat('database_inserted', len(enhanced_movies))
                 logger.info("Successfully inserted data into all tables")
             else:
                 failed_tables = [table for table, success in results.items() if not success]
                 logger.warning(f"Failed to insert into tables: {failed_tables}")
             
-            self.multi_inserter.disconnect()
             return all_success
             
         except Exception as e:
             logger.error(f"Database insertion error: {e}")
             return False
     
+    def _insert_worker(self, insert_queue: queue.Queue, insert_results: List[bool]):
+        """Insert (batch, source files) items until a None sentinel arrives (runs on a background thread)"""
+        while True:
+            item = insert_queue.get()
+            if item is None:
+                return
+            
+            batch, file_paths = item
+            db_success = self.insert_to_database(batch)
+            if db_success:
+                print(f"Successfully inserted {len(batch)} movies into database")
+                # Only now are these files' movies stored, so their checkpoints can go
+                for file_path in file_paths:
+                    self.clear_checkpoint(file_path)
+            else:
+                print(f"Failed to insert {len(batch)} movies into database")
+            insert_results.append(db_success)
+    
     def run_comprehensive_ingestion(self, max_movies: Optional[int] = None) -> Dict[str, Any]:
         """Run the complete comprehensive ingestion pipeline"""
         tmdb_files = self.base_ingestor.get_tmdb_files()
@@ -250,73 +436,97 @@ class ComprehensiveIngestor:
             'success': True,
             'enhancement_stats': {}
         }
+        pending_inserts = []
+        pending_files = []
         
-        for file_path in tmdb_files:
-            try:
-                print(f"\nProcessing: {file_path.name}")
-                
-                # Process the file
-                enhanced_movies = self.process_file_comprehensive(file_path, max_movies)
-                
-                # Save enhanced data
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"comprehensive_enhanced_{file_path.stem}_{timestamp}.json"
-                output_path = self.save_comprehensive_data(enhanced_movies, output_filename)
-                
-                # Insert into database
-                db_success = self.insert_to_database(enhanced_movies)
-                
-                results['files_processed'] += 1
-                results['total_movies'] += len(enhanced_movies)
-                results['enhanced_movies'].extend(enhanced_movies)
-                results['output_files'].append(str(output_path))
-                
-                if not db_success:
+        # Database inserts run on a background thread so they overlap the next file's enrichment
+        insert_queue = queue.Queue(maxsize=2)
+        insert_results = []
+        inserter = threading.Thread(target=self._insert_worker, args=(insert_queue, insert_results), daemon=True)
+        inserter.start()
+        
+        try:
+            for file_path in tmdb_files:
+                try:
+                    print(f"\nProcessing: {file_path.name}")
+                    
+                    # Process the file
+                    enhanced_movies = self.process_file_comprehensive(file_path, max_movies)
+                    
+                    # Save enhanced data
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    output_filename = f"comprehensive_enhanced_{file_path.stem}_{timestamp}.json"
+                    output_path = self.save_comprehensive_data(enhanced_movies, output_filename)
+                    
+                    results['files_processed'] += 1
+                    results['total_movies'] += len(enhanced_movies)
+                    results['enhanced_movies'].extend(enhanced_movies)
+                    results['output_files'].append(str(output_path))
+                    
+                    print(f"Saved {len(enhanced_movies)} enhanced movies to {output_path.name}")
+                    
+                    # Hand off to the inserter once enough movies are buffered; the file's
+                    # checkpoint is cleared only after its batch is inserted
+                    pending_inserts.extend(enhanced_movies)
+                    pending_files.append(file_path)
+                    if len(pending_inserts) >= self.insert_batch_size:
+                        insert_queue.put((pending_inserts, pending_files))
+                        pending_inserts, pending_files = [], []
+                    
+                    # Print current stats
+                    stats = self.get_statistics()
+                    print(f"Current stats: OMDb: {stats['omdb_enhanced']}, "
+                          f"Metacritic: {stats['metacritic_enhanced']}, "
+                          f"RT: {stats['rotten_tomatoes_enhanced']}, "
+                          f"Errors: {stats['errors']}")
+                    
+                except Exception as e:
                     results['success'] = False
-                
-                print(f"Saved {len(enhanced_movies)} enhanced movies to {output_filename}")
-                if db_success:
-                    print(f"Successfully inserted {len(enhanced_movies)} movies into database")
-                else:
-                    print(f"Failed to insert movies into database")
-                
-                # Print current stats
-                print(f"Current stats: OMDb: {self.stats['omdb_enhanced']}, "
-                      f"Metacritic: {self.stats['metacritic_enhanced']}, "
-                      f"RT: {self.stats['rotten_tomatoes_enhanced']}, "
-                      f"Errors: {self.stats['errors']}")
-                
-            except Exception as e:
-                results['success'] = False
-                logger.error(f"Error processing {file_path}: {e}")
-                print(f"Error processing {file_path.name}: {e}")
-                continue  # Continue with next file instead of stopping
+                    logger.error(f"Error processing {file_path}: {e}")
+                    print(f"Error processing {file_path.name}: {e}")
+                    continue  # Continue with next file instead of stopping
+        finally:
+            # Insert whatever is left (also when interrupted) and wait for the inserter
+            if pending_inserts:
+                insert_queue.put((pending_inserts, pending_files))
+            else:
+                # Files that produced no movies have nothing to insert
+                for file_path in pending_files:
+                    self.clear_checkpoint(file_path)
+            insert_queue.put(None)
+            inserter.join()
+        if not all(insert_results):
+            results['success'] = False
         
         results['enhancement_stats'] = self.get_statistics()
         return results
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive ingestion statistics"""
-        return self.stats.copy()
+        """Get comprehensive ingestion statistics (a consistent snapshot)"""
+        with self._stats_lock:
+            return self.stats.copy()
     
     def reset_statistics(self):
         """Reset all statistics to zero"""
-        self.stats = {
-            'total_movies': 0,
-            'omdb_enhanced': 0,
-            'metacritic_enhanced': 0,
-            'rotten_tomatoes_enhanced': 0,
-            'database_inserted': 0,
-            'errors': 0
-        }
+        with self._stats_lock:
+            self.stats = {
+                'total_movies': 0,
+                'omdb_enhanced': 0,
+                'metacritic_enhanced': 0,
+                'rotten_tomatoes_enhanced': 0,
+                'database_inserted': 0,
+                'scraper_skipped': 0,
+                'errors': 0
+            }
     
     def cleanup(self):
-        """Clean up resources"""
-        try:
-            if hasattr(self, 'rotten_tomatoes_scraper') and self.scrapers_available:
-                if hasattr(self.rotten_tomatoes_scraper, 'close'):
-                    self.rotten_tomatoes_scraper.close()
-                elif hasattr(self.rotten_tomatoes_scraper, 'cleanup'):
-                    self.rotten_tomatoes_scraper.cleanup()
-        except Exception as e:
-            logger.warning(f"Cleanup warning: {e}")
+        """Clean up resources (safe to call more than once)"""
+        if self._atexit_hook is not None:
+            atexit.unregister(self._atexit_hook)
+            self._atexit_hook = None
+        cleanup_fns, self._cleanup_fns = self._cleanup_fns, []
+        for cleanup_fn in cleanup_fns:
+            try:
+                cleanup_fn()
+            except Exception as e:
+                logger.warning(f"Cleanup warning: {e}")
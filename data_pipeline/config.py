@@ -5,8 +5,10 @@ Centralizes all configuration settings and constants
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -33,6 +35,7 @@ class PipelineConfig:
         'raw': Path("data/raw"),
         'processed': Path("data/processed"),
         'analysis': Path("data/analysis"),
+        'cache': Path("data/cache"),
         'logs': Path("logs")
     }
     
@@ -49,7 +52,9 @@ class PipelineConfig:
         'max_movies_per_file': None,  # None means process all
         'enable_metacritic': True,
         'enable_rotten_tomatoes': True,
-        'headless_scraping': True
+        'headless_scraping': True,
+        'max_workers': 4,  # Worker threads for OMDb/Metacritic lookups
+        'use_omdb_critic_scores': False  # Skip scraping when OMDb already has the critic score
     }
     
     # Data Quality
@@ -63,8 +68,8 @@ class PipelineConfig:
     
     # Output Configuration
     OUTPUT = {
-        'file_format': 'json',
-        'indent': 2,
+        'file_format': 'ndjson',  # 'ndjson' (one movie per line), 'json' or 'parquet' (Zstd-compressed, needs pyarrow)
+        'indent': None,  # 2 to pretty-print 'json' output (orjson supports 2-space indent only)
         'ensure_ascii': False,
         'timestamp_format': '%Y%m%d_%H%M%S'
     }
@@ -121,34 +126,37 @@ class PipelineConfig:
         return True
     
     @classmethod
-    def get_database_inserter_config(cls) -> Dict[str, Any]:
-        """Get configuration for database inserter"""
-        return {
+    @lru_cache(maxsize=None)
+    def get_database_inserter_config(cls) -> Mapping[str, Any]:
+        """Get configuration for database inserter (built once, read-only)"""
+        return MappingProxyType({
             'host': cls.DATABASE_CONFIG['host'],
             'port': cls.DATABASE_CONFIG['port'],
             'catalog': cls.DATABASE_CONFIG['catalog'],
             'schema': cls.DATABASE_CONFIG['schema']
-        }
+        })
     
     @classmethod
-    def get_scraper_config(cls) -> Dict[str, Any]:
-        """Get configuration for scrapers"""
-        return {
+    @lru_cache(maxsize=None)
+    def get_scraper_config(cls) -> Mapping[str, Any]:
+        """Get configuration for scrapers (built once, read-only)"""
+        return MappingProxyType({
             'headless': cls.PROCESSING['headless_scraping'],
             'rate_limit': cls.RATE_LIMITS['scraper'],
             'max_retries': cls.ERROR_HANDLING['max_retries']
-        }
+        })
     
     @classmethod
-    def get_ingestor_config(cls) -> Dict[str, Any]:
-        """Get configuration for ingestor"""
-        return {
+    @lru_cache(maxsize=None)
+    def get_ingestor_config(cls) -> Mapping[str, Any]:
+        """Get configuration for ingestor (built once, read-only)"""
+        return MappingProxyType({
             'omdb_api_key': cls.OMDB_API_KEY,
             'omdb_base_url': cls.OMDB_BASE_URL,
             'rate_limit': cls.RATE_LIMITS['omdb_api'],
             'batch_size': cls.PROCESSING['default_batch_size'],
             'max_movies': cls.PROCESSING['max_movies_per_file']
-        }
+        })
     
     @classmethod
     def print_config_summary(cls):
@@ -3,157 +3,329 @@
 Database inserter utility for bulk inserting enhanced movie data into Iceberg tables
 """
 
-import json
 import logging
 import subprocess
-import tempfile
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
+from .utils import build_arrow_table, deduplicate_movies, extract_year_from_date, load_iceberg_catalog, to_rating_rows
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Update count the Trino CLI prints to stderr for each INSERT it completes
+_CLI_INSERT_COUNT_RE = re.compile(r'^INSERT: (\d+) rows?$', re.MULTILINE)
+
 class DatabaseInserter:
-    """Handles bulk insertion of enhanced movie data into Iceberg tables using Docker exec"""
+    """Handles bulk insertion of enhanced movie data into Iceberg tables over a persistent Trino connection"""
+    
+    # omdb_movies columns and Trino types (see scripts/create_stage_schema.py)
+    OMDB_COLUMNS = (
+        ('imdb_id', 'VARCHAR'), ('title', 'VARCHAR'), ('year', 'INTEGER'),
+        ('omdb_title', 'VARCHAR'), ('rated', 'VARCHAR'), ('released', 'VARCHAR'),
+        ('runtime', 'VARCHAR'), ('genre', 'VARCHAR'), ('director', 'VARCHAR'),
+        ('writer', 'VARCHAR'), ('actors', 'VARCHAR'), ('plot', 'VARCHAR'),
+        ('language', 'VARCHAR'), ('country', 'VARCHAR'), ('awards', 'VARCHAR'),
+        ('poster', 'VARCHAR'), ('ratings', 'ARRAY(ROW(source VARCHAR, value VARCHAR))'), ('imdb_rating', 'DECIMAL(10,1)'),
+        ('imdb_votes', 'INTEGER'), ('metascore', 'INTEGER'), ('box_office', 'VARCHAR'),
+        ('production', 'VARCHAR'), ('website', 'VARCHAR'), ('data_source', 'VARCHAR'),
+        ('created_at', 'VARCHAR'), ('updated_at', 'VARCHAR')
+    )
+    OMDB_COLUMN_LIST = ', '.join(name for name, _ in OMDB_COLUMNS)
+    OMDB_ROW_TYPE = f"ARRAY(ROW({', '.join(f'{name} {type_}' for name, type_ in OMDB_COLUMNS)}))"
+    
+    # Batching: large batches amortize per-statement planning/commit cost
+    DEFAULT_BATCH_SIZE = int(os.getenv('TRINO_INSERT_BATCH_SIZE', '5000'))
+    MAX_STATEMENT_BYTES = 16 << 20  # Split batches whose JSON payload would exceed 16 MiB
+    INSERT_PARALLELISM = int(os.getenv('TRINO_INSERT_PARALLELISM', '4'))  # Concurrent INSERT statements
     
     def __init__(self, host: str = "localhost", port: int = 8080, 
-                 catalog: str = "iceberg", schema: str = "movies_stage"):
+                 catalog: str = "iceberg", schema: str = "movies_stage", user: str = "ingest"):
         self.host = host
         self.port = port
         self.catalog = catalog
         self.schema = schema
+        self.user = user
         self.container_name = "trino"
         
+        # Native Trino client unless TRINO_USE_DOCKER is set (falls back to docker exec + trino CLI)
+        self.use_docker = os.getenv('TRINO_USE_DOCKER', '').lower() in ('1', 'true', 'yes')
+        if not self.use_docker:
+            try:
+                import trino  # noqa: F401
+            except ImportError:
+                logger.warning("trino client not installed, falling back to docker exec")
+                self.use_docker = True
+        
+        # One connection per thread, opened lazily on first statement and reused until disconnect()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        # omdb_movies column metadata, fetched once by get_table_info()
+        self._table_info = None
+        
+        # Long-lived insert workers, so their per-thread connections are reused across bulk inserts
+        self._insert_executor = None
+        
+        # Rows committed by the last bulk_insert() call (also when it reports failure)
+        self.last_inserted_count = 0
+        
+        # Optional direct Iceberg writes via pyiceberg (bypasses Trino; Trino remains the fallback)
+        self.use_iceberg_direct = os.getenv('ICEBERG_DIRECT_WRITE', '').lower() in ('1', 'true', 'yes')
+        self._iceberg_table = None
+        
     def connect(self) -> bool:
-        """Test connection to Trino via Docker"""
+        """Test connection to Trino"""
         try:
             # Test connection by running a simple query
-            result = self._execute_trino_command("SELECT 1", "Testing connection")
+            result = self._execute_sql("SELECT 1", "Testing connection")
             return result
         except Exception as e:
             logger.error(f"Failed to connect to Trino: {e}")
             return False
     
-    def transform_movie_data(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform movie data to match the omdb_movies table schema"""
-        # Extract year from release_date if available
-        year = None
-        if movie.get('release_date'):
-            try:
-                year = int(movie['release_date'][:4])
-            except (ValueError, TypeError):
-                pass
+    def _get_cursor(self):
+        """Get this thread's cursor, opening its Trino connection on first use"""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            import trino
+            
+            connection = trino.dbapi.connect(
+                host=self.host, port=self.port, user=self.user,
+                catalog=self.catalog, schema=self.schema
+            )
+            cursor = connection.cursor()
+            
+            # Register before any statement runs, so disconnect() closes it even if one fails
+            with self._connections_lock:
+                self._connections.append((connection, cursor))
+            self._local.cursor = cursor
+        return cursor
+    
+    def _execute_sql(self, sql: str, description: str, params: Optional[Tuple] = None) -> bool:
+        """Execute a SQL statement on the persistent connection (or via Docker exec as fallback)"""
+        if self.use_docker:
+            return self._execute_trino_sql_file(sql, description)
         
-        # Transform the data to match table schema
-        transformed = {
-            'imdb_id': movie.get('imdb_id'),
-            'title': movie.get('title'),
-            'year': year,
-            'omdb_title': movie.get('omdb_title'),
-            'rated': movie.get('omdb_rated'),
-            'released': movie.get('omdb_released'),
-            'runtime': movie.get('omdb_runtime'),
-            'genre': movie.get('omdb_genre'),
-            'director': movie.get('omdb_director'),
-            'writer': movie.get('omdb_writer'),
-            'actors': movie.get('omdb_actors'),
-            'plot': movie.get('omdb_plot'),
-            'language': movie.get('omdb_language'),
-            'country': movie.get('omdb_country'),
-            'awards': movie.get('omdb_awards'),
-            'poster': movie.get('omdb_poster'),
-            'ratings': json.dumps(movie.get('omdb_ratings', [])) if movie.get('omdb_ratings') else None,
-            'imdb_rating': movie.get('omdb_imdb_rating'),
-            'imdb_votes': movie.get('omdb_imdb_votes'),
-            'metascore': movie.get('omdb_metascore'),
-            'box_office': movie.get('omdb_box_office'),
-            'production': movie.get('omdb_production'),
-            'website': movie.get('omdb_website'),
-            'data_source': movie.get('data_source', 'tmdb'),
-            'created_at': movie.get('omdb_enhanced_at') or datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+        try:
+            logger.info(f"{description}")
+            cursor = self._get_cursor()
+            # The client API rejects the trailing semicolon the CLI accepts
+            cursor.execute(sql.rstrip().rstrip(';'), params)
+            cursor.fetchall()  # Drain results so the statement runs to completion
+            logger.info(f"{description} completed successfully")
+            return True
+        except Exception as e:
+            logger.error(f"{description} failed: {e}")
+            return False
+    
+    def disconnect(self):
+        """Stop the insert workers and close every Trino connection opened by this inserter"""
+        if self._insert_executor is not None:
+            self._insert_executor.shutdown(wait=True)
+            self._insert_executor = None
         
-        return transformed
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection, cursor in connections:
+            cursor.close()
+            connection.close()
+        # Threads holding a stale cursor reconnect on their next statement
+        self._local = threading.local()
     
-    def create_insert_sql(self, movies: List[Dict[str, Any]]) -> str:
-        """Create INSERT SQL statement for bulk insertion"""
-        if not movies:
-            return ""
+    def transform_movie_data(self, movie: Dict[str, Any], now_iso: Optional[str] = None) -> Tuple:
+        """Transform movie data into a row ordered like OMDB_COLUMNS (now_iso defaults to the current time)"""
+        now_iso = now_iso or datetime.now().isoformat()
         
-        # Get column names from the first movie
-        columns = list(movies[0].keys())
-        columns_str = ', '.join(columns)
+        # Extract year from release_date if available
+        year = extract_year_from_date(movie.get('release_date'))
         
-        # Create VALUES clause
-        values_list = []
-        for movie in movies:
-            values = []
-            for col in columns:
-                value = movie.get(col)
-                if value is None:
-                    values.append('NULL')
-                elif isinstance(value, (int, float)):
-                    values.append(str(value))
-                elif isinstance(value, bool):
-                    values.append('TRUE' if value else 'FALSE')
-                else:
-                    # Escape single quotes and wrap in quotes
-                    escaped_value = str(value).replace("'", "''")
-                    # Truncate very long values to avoid SQL issues
-                    if len(escaped_value) > 1000:
-                        escaped_value = escaped_value[:1000] + "..."
-                    values.append(f"'{escaped_value}'")
-            
-            values_list.append(f"({', '.join(values)})")
+        # Positional row matching OMDB_COLUMNS (no per-row dict)
+        return (
+            movie.get('imdb_id'),
+            movie.get('title'),
+            year,
+            movie.get('omdb_title'),
+            movie.get('omdb_rated'),
+            movie.get('omdb_released'),
+            movie.get('omdb_runtime'),
+            movie.get('omdb_genre'),
+            movie.get('omdb_director'),
+            movie.get('omdb_writer'),
+            movie.get('omdb_actors'),
+            movie.get('omdb_plot'),
+            movie.get('omdb_language'),
+            movie.get('omdb_country'),
+            movie.get('omdb_awards'),
+            movie.get('omdb_poster'),
+            to_rating_rows(movie.get('omdb_ratings')),
+            movie.get('omdb_imdb_rating'),
+            movie.get('omdb_imdb_votes'),
+            movie.get('omdb_metascore'),
+            movie.get('omdb_box_office'),
+            movie.get('omdb_production'),
+            movie.get('omdb_website'),
+            movie.get('data_source', 'tmdb'),
+            movie.get('omdb_enhanced_at') or now_iso,
+            now_iso
+        )
+    
+    def _insert_template(self, payload_sql: str) -> str:
+        """INSERT ... SELECT that unnests the batch from a JSON document given as payload_sql"""
+        return f"""INSERT INTO {self.catalog}.{self.schema}.omdb_movies 
+({self.OMDB_COLUMN_LIST})
+SELECT {self.OMDB_COLUMN_LIST}
+FROM UNNEST(CAST(json_parse({payload_sql}) AS {self.OMDB_ROW_TYPE}))
+AS t ({self.OMDB_COLUMN_LIST})"""
+    
+    def _json_payload(self, movies: List[Tuple]) -> str:
+        """Serialize a batch as one JSON document of row arrays (Trino casts them to ROW by position)"""
+        return orjson.dumps(movies).decode('utf-8')
+    
+    def create_insert_sql(self, movies: List[Tuple]) -> str:
+        """Create a self-contained batch INSERT with the rows inlined as a single JSON literal"""
+        if not movies:
+            return ""
         
-        values_str = ',\n'.join(values_list)
+        # One JSON document instead of a VALUES tuple per row: Trino parses a single
+        # string literal, and only one quote-escaping pass is needed for the whole batch
+        payload = self._json_payload(movies).replace("'", "''")
+        return self._insert_template(f"'{payload}'") + ";"
+    
+    def _split_batch(self, batch: List[Tuple]) -> List[List[Tuple]]:
+        """Halve a batch until each part's JSON payload fits under MAX_STATEMENT_BYTES"""
+        if len(batch) > 1 and len(self._json_payload(batch).encode('utf-8')) > self.MAX_STATEMENT_BYTES:
+            middle = len(batch) // 2
+            return self._split_batch(batch[:middle]) + self._split_batch(batch[middle:])
+        return [batch]
+    
+    def _insert_part(self, part: List[Tuple], description: str) -> bool:
+        """Run the INSERT for one part of a batch"""
+        if self.use_docker:
+            # The CLI only takes self-contained SQL
+            return self._execute_sql(self.create_insert_sql(part), description)
+        # Native connections bind the payload; the client prepares the INSERT and quotes the value
+        return self._execute_sql(self._insert_template('?'), description, (self._json_payload(part),))
+    
+    def _insert_batch(self, batch: List[Tuple], description: str) -> bool:
+        """Insert one batch, as several statements if it exceeds MAX_STATEMENT_BYTES"""
+        if not batch:
+            logger.warning("No SQL generated for batch, skipping")
+            return True
         
-        sql = f"""INSERT INTO {self.catalog}.{self.schema}.omdb_movies 
-({columns_str})
-VALUES
-{values_str};"""
+        parts = self._split_batch(batch)
+        if len(parts) == 1:
+            return self._insert_part(batch, description)
+        return all(self._insert_part(part, f"{description} (part {num}/{len(parts)})")
+                   for num, part in enumerate(parts, 1))
+    
+    def _insert_numbered_batch(self, batch: List[Tuple], batch_num: int, total_batches: int) -> bool:
+        """Insert one batch of a bulk insert, logging its progress"""
+        logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} movies)")
         
-        return sql
+        try:
+            success = self._insert_batch(batch, f"Inserting batch {batch_num}")
+            if success:
+                logger.info(f"Batch {batch_num} inserted successfully ({len(batch)} movies)")
+            else:
+                logger.error(f"Failed to insert batch {batch_num}")
+            return success
+            
+        except Exception as e:
+            logger.error(f"Unexpected error in batch {batch_num}: {e}")
+            return False
     
-    def bulk_insert(self, movies: List[Dict[str, Any]], batch_size: int = 50) -> bool:
-        """Bulk insert movies into the omdb_movies table"""
+    def bulk_insert(self, movies: List[Dict[str, Any]], batch_size: Optional[int] = None) -> bool:
+        """Bulk insert movies into the omdb_movies table (batch_size defaults to TRINO_INSERT_BATCH_SIZE or 5000)"""
+        batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.last_inserted_count = 0
         try:
-            # Transform all movies
-            transformed_movies = [self.transform_movie_data(movie) for movie in movies]
+            # Iceberg has no primary key, so drop repeated IMDb IDs before paying for their writes
+            unique_movies = deduplicate_movies(movies)
+            if len(unique_movies) < len(movies):
+                logger.info(f"Skipping {len(movies) - len(unique_movies)} duplicate movies")
+            movies = unique_movies
+            
+            # Transform all movies (one load timestamp for the whole insert)
+            now_iso = datetime.now().isoformat()
+            transformed_movies = [self.transform_movie_data(movie, now_iso) for movie in movies]
             logger.info(f"Transformed {len(transformed_movies)} movies for database insertion")
             
-            # Process in batches
+            # Write straight to Iceberg when enabled, otherwise (or on failure) insert through Trino
+            if self.use_iceberg_direct and transformed_movies:
+                if self._append_to_iceberg(transformed_movies):
+                    self.last_inserted_count = len(transformed_movies)
+                    return True
+                logger.warning("Falling back to Trino inserts")
+            
+            # Split into batches; append-only table, so completion order doesn't matter
+            batches = [transformed_movies[i:i + batch_size] for i in range(0, len(transformed_movies), batch_size)]
+            total_batches = len(batches)
+            
             total_inserted = 0
-            for i in range(0, len(transformed_movies), batch_size):
-                batch = transformed_movies[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (len(transformed_movies) + batch_size - 1) // batch_size
-                
-                logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} movies)")
-                
-                # Create and execute INSERT SQL
-                insert_sql = self.create_insert_sql(batch)
-                if not insert_sql:
-                    logger.warning("No SQL generated for batch, skipping")
-                    continue
-                
-                try:
-                    # Execute via Docker exec using file input
-                    success = self._execute_trino_sql_file(insert_sql, f"Inserting batch {batch_num}")
-                    if success:
+            if self.use_docker:
+                # Every CLI invocation pays a JVM cold start, so send all batches as one script
+                statements = [self.create_insert_sql(part) for batch in batches for part in self._split_batch(batch)]
+                if statements:
+                    success, output = self._run_trino_script(
+                        '\n'.join(statements), f"Inserting {total_batches} batches ({len(statements)} statements)",
+                        timeout=120 * len(statements))
+                    if not success:
+                        # The CLI stops at the first failing statement; the ones before it are committed
+                        total_inserted = sum(int(count) for count in _CLI_INSERT_COUNT_RE.findall(output))
+                        logger.error(f"Bulk insert incomplete: at least {total_inserted} movies were committed "
+                                     f"before the CLI script failed")
+                        self.last_inserted_count = total_inserted
+                        return False
+                total_inserted = len(transformed_movies)
+            elif self.INSERT_PARALLELISM <= 1 or total_batches <= 1:
+                for batch_num, batch in enumerate(batches, 1):
+                    if not self._insert_numbered_batch(batch, batch_num, total_batches):
+                        logger.error(f"Bulk insert stopped at batch {batch_num}/{total_batches}; "
+                                     f"{total_inserted} movies from earlier batches were committed")
+                        self.last_inserted_count = total_inserted
+                        return False
+                    total_inserted += len(batch)
+            else:
+                # Overlap per-statement planning/commit cost across concurrent INSERTs
+                if self._insert_executor is None:
+                    self._insert_executor = ThreadPoolExecutor(max_workers=self.INSERT_PARALLELISM,
+                                                               thread_name_prefix="trino-insert")
+                futures = {
+                    self._insert_executor.submit(self._insert_numbered_batch, batch, batch_num, total_batches):
+                        (batch_num, batch)
+                    for batch_num, batch in enumerate(batches, 1)
+                }
+                committed, failed = [], []
+                for future in as_completed(futures):
+                    batch_num, batch = futures[future]
+                    if future.cancelled():
+                        failed.append(batch_num)
+                    elif future.result():
+                        committed.append(batch_num)
                         total_inserted += len(batch)
-                        logger.info(f"Batch {batch_num} inserted successfully ({len(batch)} movies)")
                     else:
-                        logger.error(f"Failed to insert batch {batch_num}")
-                        return False
-                    
-                except Exception as e:
-                    logger.error(f"Unexpected error in batch {batch_num}: {e}")
+                        failed.append(batch_num)
+                        # Skip batches that haven't started; ones already running are still
+                        # awaited, since they commit regardless and must be counted
+                        for pending in futures:
+                            pending.cancel()
+                
+                self.last_inserted_count = total_inserted
+                if failed:
+                    logger.error(f"Bulk insert incomplete: batches {sorted(committed)} committed "
+                                 f"({total_inserted} movies), batches {sorted(failed)} failed or were skipped")
                     return False
             
+            self.last_inserted_count = total_inserted
             logger.info(f"Successfully inserted {total_inserted} movies into database")
             return True
             
@@ -161,6 +333,24 @@ VALUES
             logger.error(f"Bulk insert failed: {e}")
             return False
     
+    def _get_iceberg_table(self):
+        """Load omdb_movies from the Iceberg REST catalog on first use"""
+        if self._iceberg_table is None:
+            self._iceberg_table = load_iceberg_catalog(self.catalog).load_table(f"{self.schema}.omdb_movies")
+        return self._iceberg_table
+    
+    def _append_to_iceberg(self, movies: List[Tuple]) -> bool:
+        """Append transformed movies to omdb_movies as a single Arrow table (one Parquet write, one commit)"""
+        try:
+            # Transpose rows into columns typed like the Trino table
+            arrow_table = build_arrow_table(self.OMDB_COLUMNS, list(zip(*movies)))
+            self._get_iceberg_table().append(arrow_table)
+            logger.info(f"Appended {len(movies)} movies directly to Iceberg table omdb_movies")
+            return True
+        except Exception as e:
+            logger.error(f"Direct Iceberg append failed: {e}")
+            return False
+    
     def _execute_trino_command(self, command: str, description: str) -> bool:
         """Execute a Trino command via Docker exec"""
         try:
@@ -199,103 +389,103 @@ VALUES
             logger.error(f"{description} failed: {e}")
             return False
     
-    def _execute_trino_sql_file(self, sql: str, description: str) -> bool:
-        """Execute a Trino SQL command via Docker exec using a file input"""
+    def _execute_trino_sql_file(self, sql: str, description: str, timeout: int = 120) -> bool:
+        """Execute a Trino SQL command via Docker exec, piping the SQL to the CLI's stdin"""
+        return self._run_trino_script(sql, description, timeout)[0]
+    
+    def _run_trino_script(self, sql: str, description: str, timeout: int = 120) -> Tuple[bool, str]:
+        """Pipe a SQL script to the Trino CLI via Docker exec, returning success and the CLI's stderr"""
         try:
             logger.info(f"{description}")
             
-            # Create a temporary SQL file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as f:
-                f.write(sql)
-                temp_file = f.name
+            # Stream the SQL straight into the container (no temp file or docker cp round trip)
+            docker_cmd = [
+                'docker', 'exec', '-i', self.container_name, 'trino',
+                '--server', f'{self.host}:{self.port}',
+                '--catalog', self.catalog,
+                '--schema', self.schema
+            ]
             
-            try:
-                # Copy the SQL file to the Docker container
-                copy_cmd = [
-                    'docker', 'cp', temp_file, f'{self.container_name}:/tmp/insert.sql'
-                ]
-                
-                result = subprocess.run(copy_cmd, capture_output=True, text=True, timeout=30)
-                if result.returncode != 0:
-                    logger.error(f"Failed to copy SQL file to container: {result.stderr}")
-                    return False
-                
-                # Execute the SQL file in the container
-                docker_cmd = [
-                    'docker', 'exec', self.container_name, 'trino',
-                    '--server', f'{self.host}:{self.port}',
-                    '--catalog', self.catalog,
-                    '--schema', self.schema,
-                    '--file', '/tmp/insert.sql'
-                ]
-                
-                result = subprocess.run(
-                    docker_cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=120
-                )
-                
-                if result.returncode == 0:
-                    logger.info(f"{description} completed successfully")
-                    return True
-                else:
-                    logger.error(f"{description} failed with return code {result.returncode}")
-                    if result.stderr:
-                        logger.error(f"Error output: {result.stderr}")
-                    return False
-                    
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file)
-                except:
-                    pass
+            result = subprocess.run(
+                docker_cmd,
+                input=sql,
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+            
+            if result.returncode == 0:
+                logger.info(f"{description} completed successfully")
+                return True, result.stderr
+            else:
+                logger.error(f"{description} failed with return code {result.returncode}")
+                if result.stderr:
+                    logger.error(f"Error output: {result.stderr}")
+                return False, result.stderr
                 
-        except subprocess.TimeoutExpired:
+        except subprocess.TimeoutExpired as e:
             logger.error(f"{description} timed out")
-            return False
+            # Output captured before the kill arrives as bytes even in text mode
+            stderr = e.stderr or ''
+            return False, stderr.decode('utf-8', 'replace') if isinstance(stderr, bytes) else stderr
         except Exception as e:
             logger.error(f"{description} failed: {e}")
-            return False
+            return False, ''
     
     def test_connection(self) -> bool:
         """Test database connection and table access"""
         try:
-            result = self._execute_trino_command("SELECT 1", "Testing connection")
-            return result
+            if self.use_docker:
+                return self._execute_trino_command("SELECT 1", "Testing connection")
+            return self._execute_sql("SELECT 1", "Testing connection")
         except Exception as e:
             logger.error(f"Database connection test failed: {e}")
             return False
     
     def get_table_info(self) -> Optional[Dict[str, Any]]:
-        """Get information about the omdb_movies table"""
+        """Get information about the omdb_movies table (looked up once, then memoized)"""
+        if self._table_info is not None:
+            return self._table_info
+        
+        # Ordered column names from the catalog metadata; no DESCRIBE output to parse
+        columns_sql = (
+            f"SELECT column_name FROM {self.catalog}.information_schema.columns "
+            f"WHERE table_schema = '{self.schema}' AND table_name = 'omdb_movies' "
+            f"ORDER BY ordinal_position"
+        )
+        
         try:
-            # Execute DESCRIBE command
-            result = subprocess.run([
-                'docker', 'exec', self.container_name, 'trino',
-                '--server', f'{self.host}:{self.port}',
-                '--catalog', self.catalog,
-                '--schema', self.schema,
-                '--execute', f'DESCRIBE {self.catalog}.{self.schema}.omdb_movies'
-            ], capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                # Parse the output to get column count
-                lines = result.stdout.strip().split('\n')
-                column_count = len([line for line in lines if line.strip() and not line.startswith('Column')])
-                
-                table_info = {
-                    'table_name': f"{self.catalog}.{self.schema}.omdb_movies",
-                    'columns': [line.split()[0] for line in lines if line.strip() and not line.startswith('Column')],
-                    'column_count': column_count
-                }
+            if self.use_docker:
+                result = subprocess.run([
+                    'docker', 'exec', self.container_name, 'trino',
+                    '--server', f'{self.host}:{self.port}',
+                    '--catalog', self.catalog,
+                    '--schema', self.schema,
+                    '--output-format', 'TSV',
+                    '--execute', columns_sql
+                ], capture_output=True, text=True, timeout=30)
                 
-                logger.info(f"📋 Table info: {table_info['column_count']} columns")
-                return table_info
+                if result.returncode != 0:
+                    logger.error(f"Failed to get table info: {result.stderr}")
+                    return None
+                columns = result.stdout.split()
             else:
-                logger.error(f"Failed to get table info: {result.stderr}")
+                cursor = self._get_cursor()
+                cursor.execute(columns_sql)
+                columns = [row[0] for row in cursor.fetchall()]
+            
+            if not columns:
+                logger.error(f"Table {self.catalog}.{self.schema}.omdb_movies not found")
                 return None
+            
+            self._table_info = {
+                'table_name': f"{self.catalog}.{self.schema}.omdb_movies",
+                'columns': columns,
+                'column_count': len(columns)
+            }
+            
+            logger.info(f"📋 Table info: {self._table_info['column_count']} columns")
+            return self._table_info
                 
         except Exception as e:
             logger.error(f"Failed to get table info: {e}")
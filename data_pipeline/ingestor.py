@@ -4,19 +4,26 @@ Main Movie Data Ingestion Pipeline
 Enhances TMDB data with OMDb API information and inserts into Iceberg table
 """
 
-import json
+import mmap
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+import orjson
+
+from .cache import DiskCache, make_request_key
+from .config import PipelineConfig
 from .db_inserter import DatabaseInserter
+from .utils import create_http_session, deduplicate_movies, RateLimiter
 
 class SimpleIngestor:
     """Simple ingestor that enhances TMDB data with OMDb API and inserts into database"""
     
-    def __init__(self, omdb_api_key: Optional[str] = None):
+    def __init__(self, omdb_api_key: Optional[str] = None, use_cache: bool = True):
         self.omdb_api_key = omdb_api_key or os.getenv('OMDB_API_KEY')
         if not self.omdb_api_key:
             raise ValueError("OMDb API key is required. Set OMDB_API_KEY environment variable or pass it to constructor.")
@@ -24,17 +31,44 @@ class SimpleIngestor:
         self.omdb_base_url = "http://www.omdbapi.com/"
         self.raw_data_dir = Path("data/raw")
         self.processed_data_dir = Path("data/processed")
+        self.cache_dir = Path("data/cache")
         
         # Ensure directories exist
         self.processed_data_dir.mkdir(parents=True, exist_ok=True)
         
-        # Rate limiting
-        self.omdb_delay = 0.1  # 100ms between API calls
+        # Output format for processed files ('ndjson', 'json' or 'parquet')
+        self.output_format = PipelineConfig.OUTPUT['file_format']
+        # Pretty-printing is opt-in; processed files are machine-read
+        self._json_options = orjson.OPT_NON_STR_KEYS
+        if PipelineConfig.OUTPUT['indent']:
+            self._json_options |= orjson.OPT_INDENT_2
+        
+        # Rate limiting (token bucket shared by all worker threads)
+        self.omdb_delay = 0.1  # 100ms between API calls on average
+        self.omdb_limiter = RateLimiter(rate=1 / self.omdb_delay, capacity=5)
+        
+        # Concurrency
+        self.omdb_workers = 8  # Parallel OMDb requests per file
+        
+        # HTTP session (keep-alive connection pool + retries)
+        self.session = create_http_session(pool_connections=4, pool_maxsize=32, max_retries=3)
+        
+        # OMDb responses fetched during this run, keyed by IMDb ID
+        self._omdb_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Persistent OMDb response cache shared across runs
+        self.omdb_cache_ttl = 30 * 24 * 3600  # 30 days; OMDb records rarely change
+        self.omdb_miss_ttl = 24 * 3600  # Retry IDs that were not found after 1 day
+        self.response_cache = DiskCache(self.cache_dir / "omdb_responses.sqlite",
+                                        default_ttl=self.omdb_cache_ttl) if use_cache else None
         
-        # Database inserter
+        # Database inserter (connection and schema are checked once per run)
         self.db_inserter = DatabaseInserter()
+        self._db_connection_ok = False
+        self._table_info = None
         
         # Statistics
+        self._stats_lock = threading.Lock()
         self.stats = {
             'total_movies': 0,
             'omdb_enhanced': 0,
@@ -44,22 +78,58 @@ class SimpleIngestor:
     
     def get_tmdb_files(self) -> List[Path]:
         """Get all TMDB raw data files"""
-        tmdb_files = list(self.raw_data_dir.glob("tmdb_*.json"))
+        tmdb_files = [*self.raw_data_dir.glob("tmdb_*.json"), *self.raw_data_dir.glob("tmdb_*.ndjson")]
         if not tmdb_files:
             raise FileNotFoundError("No TMDB files found in data/raw/")
         return tmdb_files
     
     def load_tmdb_data(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Load TMDB data from JSON file"""
+        """Load TMDB data from a JSON array or NDJSON file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
+            with open(file_path, 'rb') as f:
+                if file_path.suffix == '.ndjson':
+                    return [orjson.loads(line) for line in f if line.strip()]
+                # Parse straight from the memory-mapped file instead of copying it into a bytes object first
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                    return orjson.loads(view)
         except Exception as e:
             raise RuntimeError(f"Error loading {file_path}: {e}")
     
-    def enhance_movie(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Enhance a single movie with OMDb data"""
+    def _fetch_omdb_data(self, imdb_id: str) -> Dict[str, Any]:
+        """Fetch raw OMDb data for an IMDb ID, reusing responses already fetched in this run"""
+        cached = self._omdb_cache.get(imdb_id)
+        if cached is not None:
+            return cached
+        
+        params = {
+            'apikey': self.omdb_api_key,
+            'i': imdb_id,
+            'plot': 'full'
+        }
+        
+        cache_key = make_request_key(self.omdb_base_url, params)
+        if self.response_cache is not None:
+            omdb_data = self.response_cache.get(cache_key)
+            if omdb_data is not None:
+                self._omdb_cache[imdb_id] = omdb_data
+                return omdb_data
+        
+        self.omdb_limiter.acquire()
+        response = self.session.get(self.omdb_base_url, params=params, timeout=10)
+        response.raise_for_status()
+        omdb_data = orjson.loads(response.content)
+        
+        self._omdb_cache[imdb_id] = omdb_data
+        if self.response_cache is not None:
+            if omdb_data.get('Response') == 'True':
+                self.response_cache.set(cache_key, omdb_data)
+            elif omdb_data.get('Error') in ('Movie not found!', 'Incorrect IMDb ID.'):
+                self.response_cache.set(cache_key, omdb_data, expire=self.omdb_miss_ttl)
+            # Other errors (e.g. request limit reached) are transient and never persisted
+        return omdb_data
+    
+    def enhance_movie(self, movie: Dict[str, Any], enhanced_at: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance a single movie with OMDb data (enhanced_at defaults to the current time)"""
         # Get IMDb ID
         imdb_id = movie.get('imdb_id')
         if not imdb_id:
@@ -67,143 +137,148 @@ class SimpleIngestor:
         
         try:
             # Call OMDb API
-            params = {
-                'apikey': self.omdb_api_key,
-                'i': imdb_id,
-                'plot': 'full'
-            }
-            
-            import requests
-            response = requests.get(self.omdb_base_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            omdb_data = response.json()
+            omdb_data = self._fetch_omdb_data(imdb_id)
             
             if omdb_data.get('Response') == 'True':
-                # Enhance movie data
-                enhanced_movie = movie.copy()
-                enhanced_movie.update({
-                    'omdb_title': omdb_data.get('Title'),
-                    'omdb_rated': omdb_data.get('Rated'),
-                    'omdb_released': omdb_data.get('Released'),
-                    'omdb_runtime': omdb_data.get('Runtime'),
-                    'omdb_genre': omdb_data.get('Genre'),
-                    'omdb_director': omdb_data.get('Director'),
-                    'omdb_writer': omdb_data.get('Writer'),
-                    'omdb_actors': omdb_data.get('Actors'),
-                    'omdb_plot': omdb_data.get('Plot'),
-                    'omdb_language': omdb_data.get('Language'),
-                    'omdb_country': omdb_data.get('Country'),
-                    'omdb_awards': omdb_data.get('Awards'),
-                    'omdb_poster': omdb_data.get('Poster'),
-                    'omdb_ratings': omdb_data.get('Ratings', []),
-                    'omdb_imdb_rating': self._parse_rating(omdb_data.get('imdbRating')),
-                    'omdb_imdb_votes': self._parse_votes(omdb_data.get('imdbVotes')),
-                    'omdb_metascore': self._parse_metascore(omdb_data.get('Metascore')),
-                    'omdb_box_office': omdb_data.get('BoxOffice'),
-                    'omdb_production': omdb_data.get('Production'),
-                    'omdb_website': omdb_data.get('Website'),
-                    'omdb_enhanced_at': datetime.now().isoformat()
-                })
+                # Enhance movie data in a single dict build
+                get = omdb_data.get
+                enhanced_movie = {
+                    **movie,
+                    'omdb_title': get('Title'),
+                    'omdb_rated': get('Rated'),
+                    'omdb_released': get('Released'),
+                    'omdb_runtime': get('Runtime'),
+                    'omdb_genre': get('Genre'),
+                    'omdb_director': get('Director'),
+                    'omdb_writer': get('Writer'),
+                    'omdb_actors': get('Actors'),
+                    'omdb_plot': get('Plot'),
+                    'omdb_language': get('Language'),
+                    'omdb_country': get('Country'),
+                    'omdb_awards': get('Awards'),
+                    'omdb_poster': get('Poster'),
+                    'omdb_ratings': get('Ratings', []),
+                    'omdb_imdb_rating': self._parse_rating(get('imdbRating')),
+                    'omdb_imdb_votes': self._parse_votes(get('imdbVotes')),
+                    'omdb_metascore': self._parse_metascore(get('Metascore')),
+                    'omdb_box_office': get('BoxOffice'),
+                    'omdb_production': get('Production'),
+                    'omdb_website': get('Website'),
+                    'omdb_enhanced_at': enhanced_at or datetime.now().isoformat()
+                }
                 
-                self.stats['omdb_enhanced'] += 1
+                with self._stats_lock:
+                    self.stats['omdb_enhanced'] += 1
                 return enhanced_movie
             else:
                 return movie
                 
         except Exception as e:
-            self.stats['errors'] += 1
+            with self._stats_lock:
+                self.stats['errors'] += 1
             raise RuntimeError(f"Error enhancing {movie.get('title', 'Unknown')}: {e}")
-        
-        finally:
-            time.sleep(self.omdb_delay)
     
     def _parse_rating(self, rating_str: Optional[str]) -> Optional[float]:
-        """Parse rating string to float"""
-        if not rating_str or rating_str == 'N/A':
-            return None
+        """Parse rating string to float ('N/A' or missing gives None)"""
         try:
             return float(rating_str)
-        except ValueError:
+        except (TypeError, ValueError):
             return None
     
     def _parse_votes(self, votes_str: Optional[str]) -> Optional[int]:
-        """Parse votes string to integer"""
-        if not votes_str or votes_str == 'N/A':
-            return None
+        """Parse votes string to integer ('N/A' or missing gives None)"""
         try:
             return int(votes_str.replace(',', ''))
-        except ValueError:
+        except (AttributeError, ValueError):
             return None
     
     def _parse_metascore(self, metascore_str: Optional[str]) -> Optional[int]:
-        """Parse metascore string to integer"""
-        if not metascore_str or metascore_str == 'N/A':
-            return None
+        """Parse metascore string to integer ('N/A' or missing gives None)"""
         try:
             return int(metascore_str)
-        except ValueError:
+        except (TypeError, ValueError):
             return None
     
     def process_file(self, file_path: Path, max_movies: Optional[int] = None) -> List[Dict[str, Any]]:
         """Process a single TMDB file and return enhanced movies"""
-        # Load TMDB data
-        movies = self.load_tmdb_data(file_path)
+        # Load TMDB data, dropping repeated IMDb IDs
+        movies = deduplicate_movies(self.load_tmdb_data(file_path))
         
         # Limit movies if specified
         if max_movies:
             movies = movies[:max_movies]
         
-        # Process each movie
-        enhanced_movies = []
-        total_movies = len(movies)
+        # One timestamp for the whole batch
+        batch_timestamp = datetime.now().isoformat()
         
-        for i, movie in enumerate(movies):
-            # Add basic metadata
+        # Add basic metadata
+        for movie in movies:
             movie['data_source'] = 'tmdb'
-            movie['processed_at'] = datetime.now().isoformat()
-            
-            # Enhance with OMDb
-            enhanced_movie = self.enhance_movie(movie)
-            enhanced_movies.append(enhanced_movie)
+            movie['processed_at'] = batch_timestamp
         
-        self.stats['total_movies'] += len(enhanced_movies)
+        # Enhance with OMDb concurrently (order is preserved)
+        enhance = partial(self.enhance_movie, enhanced_at=batch_timestamp)
+        with ThreadPoolExecutor(max_workers=self.omdb_workers) as executor:
+            enhanced_movies = list(executor.map(enhance, movies))
+        
+        with self._stats_lock:
+            self.stats['total_movies'] += len(enhanced_movies)
         return enhanced_movies
     
     def save_enhanced_data(self, enhanced_movies: List[Dict[str, Any]], 
                           output_filename: str) -> Path:
         """Save enhanced data to processed directory"""
-        output_path = self.processed_data_dir / output_filename
+        output_path = (self.processed_data_dir / output_filename).with_suffix(f".{self.output_format}")
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(enhanced_movies, f, indent=2, ensure_ascii=False)
+            if self.output_format == 'parquet':
+                self._write_parquet(enhanced_movies, output_path)
+            elif self.output_format == 'ndjson':
+                # One record per line; never holds the whole file's bytes in memory
+                with open(output_path, 'wb', buffering=1 << 20) as f:
+                    for movie in enhanced_movies:
+                        f.write(orjson.dumps(movie, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS))
+            else:
+                # orjson emits UTF-8 bytes directly; one buffered write per file
+                with open(output_path, 'wb', buffering=1 << 20) as f:
+                    f.write(orjson.dumps(enhanced_movies, option=self._json_options))
             
             return output_path
             
         except Exception as e:
             raise RuntimeError(f"Error saving enhanced data to {output_path}: {e}")
     
+    def _write_parquet(self, movies: List[Dict[str, Any]], output_path: Path):
+        """Write movies as a Zstd-compressed Parquet file (one column per field)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        # Union of keys across all movies, since OMDb/scraper fields are optional
+        columns = dict.fromkeys(key for movie in movies for key in movie)
+        table = pa.table({column: [movie.get(column) for movie in movies] for column in columns})
+        
+        pq.write_table(table, output_path, compression='zstd', compression_level=3)
+    
     def insert_to_database(self, enhanced_movies: List[Dict[str, Any]]) -> bool:
         """Insert enhanced movies into the Iceberg table"""
         try:
-            # Test database connection first
-            if not self.db_inserter.test_connection():
-                return False
+            # Test database connection and verify the schema on first insert only
+            if not self._db_connection_ok:
+                if not self.db_inserter.test_connection():
+                    return False
+                self._db_connection_ok = True
             
-            # Get table info to verify schema
-            table_info = self.db_inserter.get_table_info()
-            if not table_info:
-                return False
+            if not self._table_info:
+                self._table_info = self.db_inserter.get_table_info()
+                if not self._table_info:
+                    return False
             
             # Perform bulk insert
-            success = self.db_inserter.bulk_insert(enhanced_movies, batch_size=50)
-            
-            if success:
-                self.stats['db_inserted'] += len(enhanced_movies)
+            success = self.db_inserter.bulk_insert(enhanced_movies)
             
-            # Clean up connection
-            self.db_inserter.disconnect()
+            # Count what was committed, including batches that landed before a failure
+            with self._stats_lock:
+                self.stats['db_inserted'] += self.db_inserter.last_inserted_count
             
             return success
             
@@ -223,43 +298,68 @@ class SimpleIngestor:
             'success': True
         }
         
-        # Process each file
-        for file_path in tmdb_files:
-            try:
-                # Process the file
-                enhanced_movies = self.process_file(file_path, max_movies)
-                
-                # Save enhanced data
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"enhanced_{file_path.stem}_{timestamp}.json"
-                output_path = self.save_enhanced_data(enhanced_movies, output_filename)
-                
-                # Insert into database
-                db_success = self.insert_to_database(enhanced_movies)
-                
-                results['files_processed'] += 1
-                results['total_movies'] += len(enhanced_movies)
-                results['enhanced_movies'].extend(enhanced_movies)
-                results['output_files'].append(str(output_path))
-                
-                if not db_success:
-                    results['success'] = False
+        # Process each file, enriching the next one in the background while the current one is inserted
+        try:
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                next_file = prefetcher.submit(self.process_file, tmdb_files[0], max_movies) if tmdb_files else None
                 
-            except Exception as e:
-                results['success'] = False
-                raise RuntimeError(f"Error processing {file_path}: {e}")
+                for index, file_path in enumerate(tmdb_files):
+                    try:
+                        # Wait for this file's enrichment, then start on the next one (at most one file ahead)
+                        enhanced_movies = next_file.result()
+                        next_file = None
+                        if index + 1 < len(tmdb_files):
+                            next_file = prefetcher.submit(self.process_file, tmdb_files[index + 1], max_movies)
+                        
+                        # Save enhanced data
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        output_filename = f"enhanced_{file_path.stem}_{timestamp}.json"
+                        output_path = self.save_enhanced_data(enhanced_movies, output_filename)
+                        
+                        # Insert into database
+                        db_success = self.insert_to_database(enhanced_movies)
+                        
+                        results['files_processed'] += 1
+                        results['total_movies'] += len(enhanced_movies)
+                        results['enhanced_movies'].extend(enhanced_movies)
+                        results['output_files'].append(str(output_path))
+                        
+                        if not db_success:
+                            results['success'] = False
+                    
+                    except Exception as e:
+                        results['success'] = False
+                        raise RuntimeError(f"Error processing {file_path}: {e}")
+        finally:
+            self.close()
         
         return results
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get current ingestion statistics"""
-        return self.stats.copy()
+        """Get current ingestion statistics (a consistent snapshot)"""
+        with self._stats_lock:
+            return self.stats.copy()
     
     def reset_statistics(self):
         """Reset all statistics to zero"""
-        self.stats = {
-            'total_movies': 0,
-            'omdb_enhanced': 0,
-            'errors': 0,
-            'db_inserted': 0
-        }
+        with self._stats_lock:
+            self.stats = {
+                'total_movies': 0,
+                'omdb_enhanced': 0,
+                'errors': 0,
+                'db_inserted': 0
+            }
+    
+    def close(self):
+        """Close pooled HTTP connections, the response cache and the database connection"""
+        self.session.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+            self.response_cache = None  # Later lookups on this instance run uncached
+        self.db_inserter.disconnect()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
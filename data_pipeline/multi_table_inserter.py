@@ -5,183 +5,197 @@ Handles insertion into multiple Iceberg tables based on data source
 """
 
 import logging
-import subprocess
-import tempfile
 import os
+import subprocess
+from operator import methodcaller
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+import orjson
+
+from .utils import build_arrow_table, load_iceberg_catalog, to_rating_rows
+
 logger = logging.getLogger(__name__)
 
+def _to_text(value: Any) -> Optional[str]:
+    """Store structured values in VARCHAR columns as text"""
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
 class MultiTableInserter:
     """Handles insertion of movie data into multiple Iceberg tables"""
     
+    # Column names and Trino types per table (see scripts/create_stage_schema.py)
+    TABLE_COLUMNS = {
+        'tmdb_movies': (
+            ('tmdb_id', 'INTEGER'), ('imdb_id', 'VARCHAR'), ('title', 'VARCHAR'),
+            ('original_title', 'VARCHAR'), ('release_date', 'VARCHAR'), ('year', 'INTEGER'),
+            ('overview', 'VARCHAR'), ('tagline', 'VARCHAR'), ('status', 'VARCHAR'),
+            ('runtime', 'INTEGER'), ('budget', 'BIGINT'), ('revenue', 'BIGINT'),
+            ('popularity', 'DECIMAL(10,4)'), ('vote_average', 'DECIMAL(10,3)'), ('vote_count', 'INTEGER'),
+            ('genres', 'ARRAY(VARCHAR)'), ('genre_ids', 'ARRAY(INTEGER)'), ('original_language', 'VARCHAR'),
+            ('production_companies', 'ARRAY(VARCHAR)'), ('production_countries', 'ARRAY(VARCHAR)'),
+            ('spoken_languages', 'ARRAY(VARCHAR)'), ('cast_data', 'VARCHAR'), ('crew_data', 'VARCHAR'),
+            ('backdrop_path', 'VARCHAR'), ('poster_path', 'VARCHAR'), ('homepage', 'VARCHAR'),
+            ('external_ids', 'VARCHAR'), ('data_source', 'VARCHAR'), ('created_at', 'VARCHAR'),
+            ('updated_at', 'VARCHAR')
+        ),
+        'omdb_movies': (
+            ('imdb_id', 'VARCHAR'), ('title', 'VARCHAR'), ('year', 'INTEGER'),
+            ('omdb_title', 'VARCHAR'), ('rated', 'VARCHAR'), ('released', 'VARCHAR'),
+            ('runtime', 'VARCHAR'), ('genre', 'VARCHAR'), ('director', 'VARCHAR'),
+            ('writer', 'VARCHAR'), ('actors', 'VARCHAR'), ('plot', 'VARCHAR'),
+            ('language', 'VARCHAR'), ('country', 'VARCHAR'), ('awards', 'VARCHAR'),
+            ('poster', 'VARCHAR'), ('ratings', 'ARRAY(ROW(source VARCHAR, value VARCHAR))'), ('imdb_rating', 'DECIMAL(10,1)'),
+            ('imdb_votes', 'INTEGER'), ('metascore', 'INTEGER'), ('box_office', 'VARCHAR'),
+            ('production', 'VARCHAR'), ('website', 'VARCHAR'), ('data_source', 'VARCHAR'),
+            ('created_at', 'VARCHAR'), ('updated_at', 'VARCHAR')
+        ),
+        'metacritic_ratings': (
+            ('tmdb_id', 'INTEGER'), ('imdb_id', 'VARCHAR'), ('title', 'VARCHAR'), ('year', 'INTEGER'),
+            ('critic_score', 'DECIMAL(10,1)'), ('critic_count', 'INTEGER'),
+            ('user_score', 'DECIMAL(10,1)'), ('user_count', 'INTEGER'),
+            ('data_source', 'VARCHAR'), ('created_at', 'VARCHAR')
+        ),
+        'rotten_tomatoes_ratings': (
+            ('tmdb_id', 'INTEGER'), ('imdb_id', 'VARCHAR'), ('title', 'VARCHAR'), ('year', 'INTEGER'),
+            ('critic_score', 'DECIMAL(10,1)'), ('critic_count', 'INTEGER'),
+            ('user_score', 'DECIMAL(10,1)'), ('user_count', 'VARCHAR'),
+            ('data_source', 'VARCHAR'), ('created_at', 'VARCHAR')
+        )
+    }
+    
+    # Movie keys feeding columns whose name differs from the key (other columns copy the same-named key)
+    COLUMN_SOURCES = {
+        'tmdb_movies': {},
+        'omdb_movies': {
+            column: f'omdb_{column}' for column in (
+                'rated', 'released', 'runtime', 'genre', 'director', 'writer', 'actors', 'language',
+                'country', 'awards', 'poster', 'imdb_rating', 'imdb_votes', 'metascore', 'box_office',
+                'production', 'website'
+            )
+        },
+        'metacritic_ratings': {
+            column: f'metacritic_{column}' for column in ('critic_score', 'critic_count', 'user_score', 'user_count')
+        },
+        'rotten_tomatoes_ratings': {
+            column: f'rt_{column}' for column in ('critic_score', 'critic_count', 'user_score', 'user_count')
+        }
+    }
+    
+    # Fixed values per table
+    ROW_CONSTANTS = {
+        'tmdb_movies': {'data_source': 'tmdb'},
+        'omdb_movies': {'data_source': 'omdb'},
+        'metacritic_ratings': {'data_source': 'metacritic'},
+        'rotten_tomatoes_ratings': {'data_source': 'rottentomatoes'}
+    }
+    
+    # Rows per INSERT statement; bounds client memory and Trino's per-query parse/plan size
+    DEFAULT_BATCH_SIZE = int(os.getenv('TRINO_INSERT_BATCH_SIZE', '5000'))
+    
     def __init__(self, host: str = "localhost", port: int = 8080, 
-                 catalog: str = "iceberg", schema: str = "movies_stage"):
+                 catalog: str = "iceberg", schema: str = "movies_stage", user: str = "ingest"):
         self.host = host
         self.port = port
         self.catalog = catalog
         self.schema = schema
+        self.user = user
         self.container_name = "trino"
         
+        # Native Trino client unless TRINO_USE_DOCKER is set (falls back to docker exec + trino CLI)
+        self.use_docker = os.getenv('TRINO_USE_DOCKER', '').lower() in ('1', 'true', 'yes')
+        if not self.use_docker:
+            try:
+                import trino  # noqa: F401
+            except ImportError:
+                logger.warning("trino client not installed, falling back to docker exec")
+                self.use_docker = True
+        
+        # Opened lazily on first statement and reused until disconnect()
+        self._connection = None
+        self._cursor = None
+        
         # Table schemas for data transformation
-        self.table_schemas = {
-            'tmdb_movies': [
-                'tmdb_id', 'imdb_id', 'title', 'original_title', 'release_date', 'year',
-                'overview', 'tagline', 'status', 'runtime', 'budget', 'revenue',
-                'popularity', 'vote_average', 'vote_count', 'genres', 'genre_ids',
-                'original_language', 'production_companies', 'production_countries',
-                'spoken_languages', 'cast_data', 'crew_data', 'backdrop_path',
-                'poster_path', 'homepage', 'external_ids', 'data_source', 'created_at', 'updated_at'
-            ],
-            'omdb_movies': [
-                'imdb_id', 'title', 'year', 'omdb_title', 'rated', 'released', 'runtime',
-                'genre', 'director', 'writer', 'actors', 'plot', 'language', 'country',
-                'awards', 'poster', 'ratings', 'imdb_rating', 'imdb_votes', 'metascore',
-                'box_office', 'production', 'website', 'data_source', 'created_at', 'updated_at'
-            ],
-            'metacritic_ratings': [
-                'tmdb_id', 'imdb_id', 'title', 'year', 'critic_score', 'critic_count',
-                'user_score', 'user_count', 'data_source', 'created_at'
-            ],
-            'rotten_tomatoes_ratings': [
-                'tmdb_id', 'imdb_id', 'title', 'year', 'critic_score', 'critic_count',
-                'user_score', 'user_count', 'data_source', 'created_at'
+        self.table_schemas = {table: [name for name, _ in columns] for table, columns in self.TABLE_COLUMNS.items()}
+        
+        # Optional direct Iceberg writes via pyiceberg (bypasses Trino; Trino remains the fallback)
+        self.use_iceberg_direct = os.getenv('ICEBERG_DIRECT_WRITE', '').lower() in ('1', 'true', 'yes')
+        self._iceberg_catalog = None
+        self._iceberg_tables = {}
+        
+        # Columns computed from the movie rather than copied from a single key
+        derived_columns = {
+            'tmdb_movies': {
+                'overview': lambda movie: self._truncate_text(movie.get('overview'), 1000),
+                'cast_data': lambda movie: _to_text(movie.get('cast_data')),
+                'crew_data': lambda movie: _to_text(movie.get('crew_data')),
+                'external_ids': lambda movie: _to_text(movie.get('external_ids'))
+            },
+            'omdb_movies': {
+                'plot': lambda movie: self._truncate_text(movie.get('omdb_plot'), 1000),
+                'ratings': lambda movie: to_rating_rows(movie.get('omdb_ratings'))
+            }
+        }
+        
+        # (column, extractor) pairs per table, built once so each row is a single pass
+        self._extractors = {
+            table: [
+                (column, derived_columns.get(table, {}).get(column) or methodcaller('get', self.COLUMN_SOURCES[table].get(column, column)))
+                for column in columns
+                if column not in self.ROW_CONSTANTS[table] and column not in ('created_at', 'updated_at')
             ]
+            for table, columns in self.table_schemas.items()
+        }
+        self._row_constants = {table: dict(self.ROW_CONSTANTS[table]) for table in self.table_schemas}
+        self._timestamp_columns = {
+            table: [column for column in ('created_at', 'updated_at') if column in columns]
+            for table, columns in self.table_schemas.items()
+        }
+        
+        # Row types used to unnest each table's JSON payload
+        self.row_types = {
+            table: f"ARRAY(ROW({', '.join(f'{name} {type_}' for name, type_ in columns)}))"
+            for table, columns in self.TABLE_COLUMNS.items()
         }
     
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
-            result = self._execute_trino_command("SELECT 1", "Testing connection")
-            return result
+            if self.use_docker:
+                return self._execute_trino_command("SELECT 1", "Testing connection")
+            return self._execute_sql("SELECT 1", "Testing connection")
         except Exception as e:
             logger.error(f"Database connection test failed: {e}")
             return False
     
-    def transform_for_tmdb_table(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform movie data for tmdb_movies table"""
-        transformed = {}
-        
-        field_mapping = {
-            'tmdb_id': movie.get('tmdb_id'),
-            'imdb_id': movie.get('imdb_id'),
-            'title': movie.get('title'),
-            'original_title': movie.get('original_title'),
-            'release_date': movie.get('release_date'),
-            'year': movie.get('year'),
-            'overview': self._truncate_text(movie.get('overview'), 1000),
-            'tagline': movie.get('tagline'),
-            'status': movie.get('status'),
-            'runtime': movie.get('runtime'),
-            'budget': movie.get('budget'),
-            'revenue': movie.get('revenue'),
-            'popularity': movie.get('popularity'),
-            'vote_average': movie.get('vote_average'),
-            'vote_count': movie.get('vote_count'),
-            'genres': movie.get('genres'),
-            'genre_ids': movie.get('genre_ids'),
-            'original_language': movie.get('original_language'),
-            'production_companies': movie.get('production_companies'),
-            'production_countries': movie.get('production_countries'),
-            'spoken_languages': movie.get('spoken_languages'),
-            'cast_data': movie.get('cast_data'),
-            'crew_data': movie.get('crew_data'),
-            'backdrop_path': movie.get('backdrop_path'),
-            'poster_path': movie.get('poster_path'),
-            'homepage': movie.get('homepage'),
-            'external_ids': movie.get('external_ids'),
-            'data_source': 'tmdb',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
+    def _transform(self, table_name: str, movie: Dict[str, Any], now_iso: Optional[str]) -> Dict[str, Any]:
+        """Build one row with the table's precompiled column extractors"""
+        transformed = {column: extract(movie) for column, extract in self._extractors[table_name]}
+        transformed.update(self._row_constants[table_name])
         
-        for field in self.table_schemas['tmdb_movies']:
-            transformed[field] = field_mapping.get(field)
+        now_iso = now_iso or datetime.now().isoformat()
+        for column in self._timestamp_columns[table_name]:
+            transformed[column] = now_iso
         
         return transformed
     
-    def transform_for_omdb_table(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform movie data for omdb_movies table"""
-        transformed = {}
-        
-        field_mapping = {
-            'imdb_id': movie.get('imdb_id'),
-            'title': movie.get('title'),
-            'year': movie.get('year'),
-            'omdb_title': movie.get('omdb_title'),
-            'rated': movie.get('omdb_rated'),
-            'released': movie.get('omdb_released'),
-            'runtime': movie.get('omdb_runtime'),
-            'genre': movie.get('omdb_genre'),
-            'director': movie.get('omdb_director'),
-            'writer': movie.get('omdb_writer'),
-            'actors': movie.get('omdb_actors'),
-            'plot': self._truncate_text(movie.get('omdb_plot'), 1000),
-            'language': movie.get('omdb_language'),
-            'country': movie.get('omdb_country'),
-            'awards': movie.get('omdb_awards'),
-            'poster': movie.get('omdb_poster'),
-            'ratings': str(movie.get('omdb_ratings', [])),
-            'imdb_rating': movie.get('omdb_imdb_rating'),
-            'imdb_votes': movie.get('omdb_imdb_votes'),
-            'metascore': movie.get('omdb_metascore'),
-            'box_office': movie.get('omdb_box_office'),
-            'production': movie.get('omdb_production'),
-            'website': movie.get('omdb_website'),
-            'data_source': 'omdb',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
-        }
-        
-        for field in self.table_schemas['omdb_movies']:
-            transformed[field] = field_mapping.get(field)
-        
-        return transformed
+    def transform_for_tmdb_table(self, movie: Dict[str, Any], now_iso: Optional[str] = None) -> Dict[str, Any]:
+        """Transform movie data for tmdb_movies table (now_iso defaults to the current time)"""
+        return self._transform('tmdb_movies', movie, now_iso)
     
-    def transform_for_metacritic_table(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform movie data for metacritic_ratings table"""
-        transformed = {}
-        
-        field_mapping = {
-            'tmdb_id': movie.get('tmdb_id'),
-            'imdb_id': movie.get('imdb_id'),
-            'title': movie.get('title'),
-            'year': movie.get('year'),
-            'critic_score': movie.get('metacritic_critic_score'),
-            'critic_count': movie.get('metacritic_critic_count'),
-            'user_score': movie.get('metacritic_user_score'),
-            'user_count': movie.get('metacritic_user_count'),
-            'data_source': 'metacritic',
-            'created_at': datetime.now().isoformat()
-        }
-        
-        for field in self.table_schemas['metacritic_ratings']:
-            transformed[field] = field_mapping.get(field)
-        
-        return transformed
+    def transform_for_omdb_table(self, movie: Dict[str, Any], now_iso: Optional[str] = None) -> Dict[str, Any]:
+        """Transform movie data for omdb_movies table (now_iso defaults to the current time)"""
+        return self._transform('omdb_movies', movie, now_iso)
     
-    def transform_for_rotten_tomatoes_table(self, movie: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform movie data for rotten_tomatoes_ratings table"""
-        transformed = {}
-        
-        field_mapping = {
-            'tmdb_id': movie.get('tmdb_id'),
-            'imdb_id': movie.get('imdb_id'),
-            'title': movie.get('title'),
-            'year': movie.get('year'),
-            'critic_score': movie.get('rt_critic_score'),
-            'critic_count': movie.get('rt_critic_count'),
-            'user_score': movie.get('rt_user_score'),
-            'user_count': movie.get('rt_user_count'),
-            'data_source': 'rottentomatoes',
-            'created_at': datetime.now().isoformat()
-        }
-        
-        for field in self.table_schemas['rotten_tomatoes_ratings']:
-            transformed[field] = field_mapping.get(field)
-        
-        return transformed
+    def transform_for_metacritic_table(self, movie: Dict[str, Any], now_iso: Optional[str] = None) -> Dict[str, Any]:
+        """Transform movie data for metacritic_ratings table (now_iso defaults to the current time)"""
+        return self._transform('metacritic_ratings', movie, now_iso)
+    
+    def transform_for_rotten_tomatoes_table(self, movie: Dict[str, Any], now_iso: Optional[str] = None) -> Dict[str, Any]:
+        """Transform movie data for rotten_tomatoes_ratings table (now_iso defaults to the current time)"""
+        return self._transform('rotten_tomatoes_ratings', movie, now_iso)
     
     def _truncate_text(self, text: Any, max_length: int) -> Optional[str]:
         """Truncate text to specified length"""
@@ -193,7 +207,7 @@ class MultiTableInserter:
         return text_str[:max_length-3] + "..."
     
     def create_insert_sql(self, table_name: str, data: List[Dict[str, Any]]) -> str:
-        """Create INSERT SQL for a specific table"""
+        """Create an INSERT ... SELECT for a specific table that unnests the rows from a single JSON literal"""
         if not data:
             return ""
         
@@ -202,51 +216,26 @@ class MultiTableInserter:
             raise ValueError(f"Unknown table: {table_name}")
         
         columns = ', '.join(schema)
-        values_list = []
         
-        for row in data:
-            row_values = []
-            for field in schema:
-                value = row.get(field)
-                if value is None:
-                    row_values.append('NULL')
-                elif isinstance(value, (int, float)):
-                    row_values.append(str(value))
-                elif isinstance(value, bool):
-                    row_values.append('TRUE' if value else 'FALSE')
-                elif isinstance(value, list):
-                    # Handle arrays
-                    if value:
-                        array_values = []
-                        for item in value:
-                            if isinstance(item, str):
-                                escaped_item = str(item).replace("'", "''")
-                                array_values.append(f"'{escaped_item}'")
-                            else:
-                                array_values.append(str(item))
-                        row_values.append(f"ARRAY[{', '.join(array_values)}]")
-                    else:
-                        row_values.append('ARRAY[]')
-                else:
-                    # Escape single quotes and wrap in quotes
-                    escaped_value = str(value).replace("'", "''")
-                    row_values.append(f"'{escaped_value}'")
-            
-            values_list.append(f"({', '.join(row_values)})")
+        # Serialize every row (as a positional JSON array) in one orjson call and escape quotes once,
+        # instead of formatting each value in Python; Trino casts the arrays to ROWs by position
+        # Missing keys become NULL, as with the per-value formatting this replaced
+        rows = [[row.get(column) for column in schema] for row in data]
+        payload = orjson.dumps(rows, default=str).decode('utf-8').replace("'", "''")
         
-        sql = f"INSERT INTO {self.catalog}.{self.schema}.{table_name} ({columns}) VALUES {', '.join(values_list)};"
+        sql = f"""INSERT INTO {self.catalog}.{self.schema}.{table_name} ({columns})
+SELECT {columns}
+FROM UNNEST(CAST(json_parse('{payload}') AS {self.row_types[table_name]}))
+AS t ({columns});"""
         return sql
     
     def insert_tmdb_data(self, movies: List[Dict[str, Any]]) -> bool:
         """Insert TMDB data into tmdb_movies table"""
         try:
-            transformed_movies = [self.transform_for_tmdb_table(movie) for movie in movies]
-            insert_sql = self.create_insert_sql('tmdb_movies', transformed_movies)
-            
-            if not insert_sql:
-                return False
-            
-            success = self._execute_trino_sql_file(insert_sql, f"Inserting {len(movies)} movies into tmdb_movies")
+            # One load timestamp for the whole insert
+            now_iso = datetime.now().isoformat()
+            transformed_movies = [self.transform_for_tmdb_table(movie, now_iso) for movie in movies]
+            success = self._write_rows('tmdb_movies', transformed_movies, f"Inserting {len(movies)} movies into tmdb_movies")
             if success:
                 logger.info(f"Successfully inserted {len(movies)} movies into tmdb_movies table")
             
@@ -259,13 +248,10 @@ class MultiTableInserter:
     def insert_omdb_data(self, movies: List[Dict[str, Any]]) -> bool:
         """Insert OMDb data into omdb_movies table"""
         try:
-            transformed_movies = [self.transform_for_omdb_table(movie) for movie in movies]
-            insert_sql = self.create_insert_sql('omdb_movies', transformed_movies)
-            
-            if not insert_sql:
-                return False
-            
-            success = self._execute_trino_sql_file(insert_sql, f"Inserting {len(movies)} movies into omdb_movies")
+            # One load timestamp for the whole insert
+            now_iso = datetime.now().isoformat()
+            transformed_movies = [self.transform_for_omdb_table(movie, now_iso) for movie in movies]
+            success = self._write_rows('omdb_movies', transformed_movies, f"Inserting {len(movies)} movies into omdb_movies")
             if success:
                 logger.info(f"Successfully inserted {len(movies)} movies into omdb_movies table")
             
@@ -278,19 +264,16 @@ class MultiTableInserter:
     def insert_metacritic_data(self, movies: List[Dict[str, Any]]) -> bool:
         """Insert Metacritic data into metacritic_ratings table"""
         try:
-            metacritic_movies = [movie for movie in movies if movie.get('metacritic_critic_score') is not None]
+            # Filter and transform in one pass
+            now_iso = datetime.now().isoformat()
+            transformed_movies = [self.transform_for_metacritic_table(movie, now_iso) for movie in movies
+                                  if movie.get('metacritic_critic_score') is not None]
             
-            if not metacritic_movies:
+            if not transformed_movies:
                 logger.info("No Metacritic data to insert")
                 return True
             
-            transformed_movies = [self.transform_for_metacritic_table(movie) for movie in metacritic_movies]
-            insert_sql = self.create_insert_sql('metacritic_ratings', transformed_movies)
-            
-            if not insert_sql:
-                return False
-            
-            success = self._execute_trino_sql_file(insert_sql, f"Inserting {len(transformed_movies)} ratings into metacritic_ratings")
+            success = self._write_rows('metacritic_ratings', transformed_movies, f"Inserting {len(transformed_movies)} ratings into metacritic_ratings")
             if success:
                 logger.info(f"Successfully inserted {len(transformed_movies)} ratings into metacritic_ratings table")
             
@@ -303,19 +286,16 @@ class MultiTableInserter:
     def insert_rotten_tomatoes_data(self, movies: List[Dict[str, Any]]) -> bool:
         """Insert Rotten Tomatoes data into rotten_tomatoes_ratings table"""
         try:
-            rt_movies = [movie for movie in movies if movie.get('rt_critic_score') is not None]
+            # Filter and transform in one pass
+            now_iso = datetime.now().isoformat()
+            transformed_movies = [self.transform_for_rotten_tomatoes_table(movie, now_iso) for movie in movies
+                                  if movie.get('rt_critic_score') is not None]
             
-            if not rt_movies:
+            if not transformed_movies:
                 logger.info("No Rotten Tomatoes data to insert")
                 return True
             
-            transformed_movies = [self.transform_for_rotten_tomatoes_table(movie) for movie in rt_movies]
-            insert_sql = self.create_insert_sql('rotten_tomatoes_ratings', transformed_movies)
-            
-            if not insert_sql:
-                return False
-            
-            success = self._execute_trino_sql_file(insert_sql, f"Inserting {len(transformed_movies)} ratings into rotten_tomatoes_ratings")
+            success = self._write_rows('rotten_tomatoes_ratings', transformed_movies, f"Inserting {len(transformed_movies)} ratings into rotten_tomatoes_ratings")
             if success:
                 logger.info(f"Successfully inserted {len(transformed_movies)} ratings into rotten_tomatoes_ratings table")
             
@@ -325,15 +305,92 @@ class MultiTableInserter:
             logger.error(f"Error inserting Rotten Tomatoes data: {e}")
             return False
     
+    def _get_iceberg_table(self, table_name: str):
+        """Load a stage table from the Iceberg REST catalog on first use"""
+        if table_name not in self._iceberg_tables:
+            if self._iceberg_catalog is None:
+                self._iceberg_catalog = load_iceberg_catalog(self.catalog)
+            self._iceberg_tables[table_name] = self._iceberg_catalog.load_table(f"{self.schema}.{table_name}")
+        return self._iceberg_tables[table_name]
+    
+    def _append_to_iceberg(self, table_name: str, data: List[Dict[str, Any]]) -> bool:
+        """Append transformed rows to a table as one Arrow table (one Parquet write, one commit)"""
+        try:
+            columns = [[row.get(name) for row in data] for name in self.table_schemas[table_name]]
+            self._get_iceberg_table(table_name).append(build_arrow_table(self.TABLE_COLUMNS[table_name], columns))
+            logger.info(f"Appended {len(data)} rows directly to Iceberg table {table_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Direct Iceberg append to {table_name} failed: {e}")
+            return False
+    
+    def _write_rows(self, table_name: str, data: List[Dict[str, Any]], description: str) -> bool:
+        """Write transformed rows: staged as Parquet straight into Iceberg when enabled, otherwise via Trino SQL"""
+        if self.use_iceberg_direct and data:
+            if self._append_to_iceberg(table_name, data):
+                return True
+            logger.warning(f"Falling back to Trino insert for {table_name}")
+        
+        statements = self._insert_statements(table_name, data)
+        if not statements:
+            return False
+        
+        # Stop at the first failed chunk
+        return all(self._execute_sql(sql, f"{description} (chunk {chunk}/{len(statements)})")
+                   for chunk, sql in enumerate(statements, 1))
+    
+    def _insert_statements(self, table_name: str, data: List[Dict[str, Any]]) -> List[str]:
+        """Create one INSERT per DEFAULT_BATCH_SIZE rows"""
+        batch_size = self.DEFAULT_BATCH_SIZE
+        return [self.create_insert_sql(table_name, data[i:i + batch_size]) for i in range(0, len(data), batch_size)]
+    
     def insert_all_data(self, movies: List[Dict[str, Any]]) -> Dict[str, bool]:
-        """Insert data into all appropriate tables"""
+        """Insert data into all appropriate tables (one Trino CLI invocation per table in Docker mode)"""
         results = {}
         
         try:
-            results['tmdb_movies'] = self.insert_tmdb_data(movies)
-            results['omdb_movies'] = self.insert_omdb_data(movies)
-            results['metacritic_ratings'] = self.insert_metacritic_data(movies)
-            results['rotten_tomatoes_ratings'] = self.insert_rotten_tomatoes_data(movies)
+            # One load timestamp for every table; ratings tables only get movies that actually have scores
+            now_iso = datetime.now().isoformat()
+            table_rows = {
+                'tmdb_movies': [self.transform_for_tmdb_table(movie, now_iso) for movie in movies],
+                'omdb_movies': [self.transform_for_omdb_table(movie, now_iso) for movie in movies],
+                'metacritic_ratings': [self.transform_for_metacritic_table(movie, now_iso) for movie in movies
+                                       if movie.get('metacritic_critic_score') is not None],
+                'rotten_tomatoes_ratings': [self.transform_for_rotten_tomatoes_table(movie, now_iso) for movie in movies
+                                            if movie.get('rt_critic_score') is not None]
+            }
+            
+            statements = []
+            for table_name, rows in table_rows.items():
+                if not rows:
+                    # Nothing to insert is only a failure for the base tables
+                    results[table_name] = table_name.endswith('_ratings')
+                    continue
+                
+                if self.use_iceberg_direct:
+                    if self._append_to_iceberg(table_name, rows):
+                        results[table_name] = True
+                        continue
+                    logger.warning(f"Falling back to Trino insert for {table_name}")
+                
+                statements.append((table_name, self._insert_statements(table_name, rows)))
+            
+            for table_name, table_sqls in statements:
+                if self.use_docker:
+                    # One CLI run (one JVM start) per table, so each table reports its own result
+                    results[table_name] = self._execute_trino_sql_file(
+                        '\n'.join(table_sqls),
+                        f"Inserting {len(table_rows[table_name])} rows into {table_name}",
+                        timeout=60 * len(table_sqls)
+                    )
+                else:
+                    # Statements share the persistent connection
+                    results[table_name] = all(
+                        self._execute_sql(sql, f"Inserting chunk {chunk}/{len(table_sqls)} into {table_name}")
+                        for chunk, sql in enumerate(table_sqls, 1)
+                    )
+                if results[table_name]:
+                    logger.info(f"Successfully inserted {len(table_rows[table_name])} rows into {table_name} table")
             
             return results
             
@@ -341,6 +398,35 @@ class MultiTableInserter:
             logger.error(f"Error in multi-table insertion: {e}")
             return {table: False for table in ['tmdb_movies', 'omdb_movies', 'metacritic_ratings', 'rotten_tomatoes_ratings']}
     
+    def _get_cursor(self):
+        """Get the shared cursor, opening the Trino connection on first use"""
+        if self._cursor is None:
+            import trino
+            
+            self._connection = trino.dbapi.connect(
+                host=self.host, port=self.port, user=self.user,
+                catalog=self.catalog, schema=self.schema
+            )
+            self._cursor = self._connection.cursor()
+        return self._cursor
+    
+    def _execute_sql(self, sql: str, description: str) -> bool:
+        """Execute a SQL statement on the persistent connection (or via Docker exec as fallback)"""
+        if self.use_docker:
+            return self._execute_trino_sql_file(sql, description)
+        
+        try:
+            logger.info(f"Executing: {description}")
+            cursor = self._get_cursor()
+            # The client API rejects the trailing semicolon the CLI accepts
+            cursor.execute(sql.rstrip().rstrip(';'))
+            cursor.fetchall()  # Drain results so the statement runs to completion
+            logger.info(f"SQL execution completed successfully: {description}")
+            return True
+        except Exception as e:
+            logger.error(f"SQL execution failed: {description} - {e}")
+            return False
+    
     def _execute_trino_command(self, command: str, description: str) -> bool:
         """Execute a Trino command via Docker exec"""
         try:
@@ -372,49 +458,38 @@ class MultiTableInserter:
             logger.error(f"Command failed: {description} - {e}")
             return False
     
-    def _execute_trino_sql_file(self, sql: str, description: str) -> bool:
-        """Execute SQL via temporary file to avoid command length limits"""
+    def _execute_trino_sql_file(self, sql: str, description: str, timeout: int = 60) -> bool:
+        """Execute SQL by piping it to the Trino CLI's stdin to avoid command length limits"""
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as f:
-                f.write(sql)
-                temp_file_path = f.name
+            # Stream the SQL straight into the container (no temp file or docker cp round trip)
+            exec_cmd = [
+                'docker', 'exec', '-i', self.container_name, 'trino',
+                '--server', f'{self.host}:{self.port}',
+                '--catalog', self.catalog,
+                '--schema', self.schema
+            ]
             
-            try:
-                # Copy file to Docker container
-                copy_cmd = ['docker', 'cp', temp_file_path, f'{self.container_name}:/tmp/temp_insert.sql']
-                result = subprocess.run(copy_cmd, capture_output=True, text=True, timeout=30)
-                
-                if result.returncode != 0:
-                    logger.error(f"Failed to copy SQL file to container: {result.stderr}")
-                    return False
-                
-                # Execute SQL file in container
-                exec_cmd = [
-                    'docker', 'exec', self.container_name, 'trino',
-                    '--server', f'{self.host}:{self.port}',
-                    '--catalog', self.catalog,
-                    '--schema', self.schema,
-                    '--file', '/tmp/temp_insert.sql'
-                ]
-                
-                result = subprocess.run(exec_cmd, capture_output=True, text=True, timeout=60)
-                
-                if result.returncode == 0:
-                    logger.info(f"SQL execution completed successfully: {description}")
-                    return True
-                else:
-                    logger.error(f"SQL execution failed with return code {result.returncode}: {description}")
-                    if result.stderr:
-                        logger.error(f"Error output: {result.stderr}")
-                    return False
-                    
-            finally:
-                os.unlink(temp_file_path)
+            result = subprocess.run(exec_cmd, input=sql, capture_output=True, text=True, timeout=timeout)
+            
+            if result.returncode == 0:
+                logger.info(f"SQL execution completed successfully: {description}")
+                return True
+            else:
+                logger.error(f"SQL execution failed with return code {result.returncode}: {description}")
+                if result.stderr:
+                    logger.error(f"Error output: {result.stderr}")
+                return False
                 
         except Exception as e:
             logger.error(f"SQL execution failed: {description} - {e}")
             return False
     
     def disconnect(self):
-        """No connection to close with Docker exec approach"""
-        logger.info("Docker exec connection closed")
+        """Close the Trino connection (nothing to close with the Docker exec approach)"""
+        if self._cursor is not None:
+            self._cursor.close()
+        if self._connection is not None:
+            self._connection.close()
+        self._cursor = None
+        self._connection = None
+        logger.info("Trino connection closed")
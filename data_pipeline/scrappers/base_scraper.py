@@ -1,26 +1,62 @@
 # base_scraper.py
+import atexit
 import os
-import urllib.robotparser
+import threading
 from urllib.parse import urljoin, urlparse
 from abc import ABC, abstractmethod
 import requests
-from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
-from typing import Optional, Dict
+from protego import Protego
+from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext, TimeoutError as PlaywrightTimeoutError
+from typing import Collection, Optional, Dict, Tuple
 import time
 import logging
 import re
+import string
 import unicodedata
 from dotenv import load_dotenv
 
+from ..utils import create_http_session, RateLimiter
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger("scraper")
 
+# Parsed robots.txt per URL, shared by all scraper instances: url -> (parser, expires_at)
+_ROBOTS_CACHE: Dict[str, Tuple[Protego, float]] = {}
+_ROBOTS_TTL = 6 * 3600  # Refetch robots.txt every 6 hours
+_ROBOTS_MISS_TTL = 300  # Retry a failed fetch after 5 minutes
+_ROBOTS_LOCK = threading.Lock()
+# Stand-ins when robots.txt cannot be read (RFC 9309: missing file allows all, unreachable disallows all)
+_ROBOTS_ALLOW_ALL = ""
+_ROBOTS_DISALLOW_ALL = "User-agent: *\nDisallow: /"
+
+# Regex patterns compiled once at import
+_SEPARATOR_RE = re.compile(r"[\s_\-]+")
+_PAREN_YEAR_RE = re.compile(r'\((\d{4})\)')
+_SLUG_TABLES: Dict[str, Dict[int, Optional[str]]] = {}  # Per separator
+
+
+def _slug_table(sep: str) -> Dict[int, Optional[str]]:
+    """Get the str.translate table that lowercases ASCII and drops characters not allowed in a slug using sep."""
+    table = _SLUG_TABLES.get(sep)
+    if table is None:
+        allowed = set(string.ascii_lowercase + string.digits + sep)
+        lowered = (chr(code).lower() for code in range(128))
+        table = _SLUG_TABLES[sep] = {code: (char if char in allowed else None)
+                                     for code, char in enumerate(lowered)}
+    return table
+
+
 class BaseScraper(ABC):
     """Base class for all scrapers with common functionality."""
     
     DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    REQUEST_DELAY = 0.5  # Minimum seconds between requests to the same host (unless robots.txt sets Crawl-delay)
+    
+    # Per-host pacing shared by all instances; only waits when the previous request was too recent
+    _HOST_LIMITERS: Dict[str, RateLimiter] = {}
+    _limiter_lock = threading.Lock()
 
     def __init__(self, base_url: str, robots_txt_path: str = "robots.txt", user_agent: str = ""):
         if not base_url.endswith('/'):
@@ -28,25 +64,59 @@ class BaseScraper(ABC):
         self.base_url = base_url
         self.robots_txt_url = urljoin(self.base_url, robots_txt_path or "robots.txt")
         self.user_agent = user_agent or self.DEFAULT_USER_AGENT
-        self.robot_parser = urllib.robotparser.RobotFileParser()
-        self._load_robots_txt()
+        self.robot_parser = self._load_robots_txt()
+        self.request_delay = self.robot_parser.crawl_delay(self.user_agent) or self.REQUEST_DELAY
 
-    def _load_robots_txt(self) -> None:
-        """Load and parse robots.txt file."""
-        try:
-            self.robot_parser.set_url(self.robots_txt_url)
-            self.robot_parser.read()
-            logger.info(f"Loaded robots.txt from {self.robots_txt_url}")
-        except Exception as e:
-            logger.warning(f"Failed to load robots.txt: {e}")
+    def _load_robots_txt(self) -> Protego:
+        """Load and parse robots.txt file (cached per URL across instances)."""
+        # Held while fetching so concurrent scrapers for the same site wait for one download
+        with _ROBOTS_LOCK:
+            cached = _ROBOTS_CACHE.get(self.robots_txt_url)
+            if cached and time.time() < cached[1]:
+                return cached[0]
+            
+            ttl = _ROBOTS_TTL
+            try:
+                response = requests.get(self.robots_txt_url, timeout=5,
+                                        headers={"User-Agent": self.user_agent})
+                if response.status_code in (401, 403):
+                    content = _ROBOTS_DISALLOW_ALL
+                elif 400 <= response.status_code < 500:
+                    content = _ROBOTS_ALLOW_ALL
+                else:
+                    response.raise_for_status()
+                    content = response.text
+                logger.info(f"Loaded robots.txt from {self.robots_txt_url}")
+            except requests.exceptions.RequestException as e:
+                # Cache failures only briefly so a transient error is not kept for hours
+                content = _ROBOTS_DISALLOW_ALL
+                ttl = _ROBOTS_MISS_TTL
+                logger.warning(f"Failed to load robots.txt: {e}")
+            
+            parser = Protego.parse(content)
+            _ROBOTS_CACHE[self.robots_txt_url] = (parser, time.time() + ttl)
+            return parser
+
+    @classmethod
+    def clear_robots_cache(cls) -> None:
+        """Forget all cached robots.txt files."""
+        with _ROBOTS_LOCK:
+            _ROBOTS_CACHE.clear()
+
+    def _host_limiter(self, host: str) -> RateLimiter:
+        """Get the shared limiter spacing requests to host by the site's request delay."""
+        with self._limiter_lock:
+            limiter = self._HOST_LIMITERS.get(host)
+            if limiter is None:
+                limiter = self._HOST_LIMITERS[host] = RateLimiter(rate=1 / self.request_delay)
+            return limiter
 
     def is_scraping_allowed(self, url: str) -> bool:
         """Check if scraping is allowed for the given URL."""
-        parsed_url = urlparse(url)
-        return self.robot_parser.can_fetch(self.user_agent, parsed_url.path)
+        return self.robot_parser.can_fetch(url, self.user_agent)
     
     def get_ratings(self, movie_title: str, year: int, sep: str) -> Optional[Dict[str, int | float | None]]:
-        """Get ratings for a movie with title preprocessing."""
+        """Get ratings for a movie with title preprocessing ({} if the site has no match, None if the lookup failed)."""
         if not movie_title:
             logger.error("Movie title cannot be empty.")
             return {}
@@ -63,9 +133,8 @@ class BaseScraper(ABC):
     def _preprocess_title(self, title: str, sep: str) -> str:
         """Convert title to URL-safe slug."""
         title = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii")
-        title = title.lower()
-        title = re.sub(r"[\s_\-]+", sep, title) 
-        title = re.sub(rf"[^{re.escape(sep)}a-z0-9]", "", title)
+        # Collapse separators first, then lowercase and drop invalid characters in one pass
+        title = _SEPARATOR_RE.sub(sep, title).translate(_slug_table(sep))
         return title.strip(sep)
 
     @abstractmethod
@@ -84,55 +153,137 @@ class BaseScraper(ABC):
 class HtmlScraper(BaseScraper):
     """Simple scraper for static HTML pages using requests."""
     
-    REQUEST_DELAY = 0.5
+    # One session per user agent, shared by all instances so keep-alive connections are reused
+    _SESSION_POOL: Dict[str, requests.Session] = {}
+    _pool_lock = threading.Lock()
 
     def __init__(self, base_url: str, robots_txt_path: str = "robots.txt", user_agent: str = ""):
         super().__init__(base_url, robots_txt_path, user_agent)
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.user_agent})
+        with self._pool_lock:
+            self.session = self._SESSION_POOL.get(self.user_agent)
+            if self.session is None:
+                self.session = self._SESSION_POOL[self.user_agent] = create_http_session(
+                    pool_connections=4, pool_maxsize=32, max_retries=3,
+                    headers={"User-Agent": self.user_agent})
 
     def _fetch_page(self, url: str) -> Optional[str]:
-        """Fetch page content with rate limiting."""
+        """Fetch page content with rate limiting ('' if the page does not exist, None if the fetch failed)."""
         try:
-            logger.info(f"Fetching: {url}")
+            self._host_limiter(urlparse(url).netloc).acquire()
+            logger.info("Fetching: %s", url)
             response = self.session.get(url)
+            if response.status_code == 404:
+                return ""
             response.raise_for_status()
-            time.sleep(self.REQUEST_DELAY)
             return response.text
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
 
+    def close(self):
+        """Close the HTTP session's connections (it reconnects if another instance uses it later)."""
+        self.session.close()
+
 
 class PlaywrightScraper(BaseScraper):
     """Scraper for dynamic pages using Playwright."""
     
+    # Only the DOM is parsed, so these are never downloaded
+    BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet'}
+    # Ad and analytics hosts (matched as substrings of the request URL)
+    BLOCKED_URL_PARTS = ('doubleclick', 'google-analytics', 'googletagmanager',
+                         'googlesyndication', 'amazon-adsystem', 'scorecardresearch')
+    
+    # Present once the scorecard has rendered
+    SCORE_SELECTOR = 'media-scorecard rt-text[slot="criticsScore"]'
+    
+    # Reads the scorecard and metadata years in one browser round-trip instead of a query per element
+    SCORECARD_SCRIPT = """() => {
+        if (!document.querySelector('media-scorecard')) return null;
+        const years = [...document.querySelectorAll('rt-text[slot="metadataProp"]')]
+            .map(e => (e.innerText || '').match(/(19|20)\\d{2}/))
+            .filter(m => m)
+            .map(m => +m[0]);
+        return {
+            hasScores: !!(document.querySelector('rt-text[slot="criticsScore"]')
+                          && document.querySelector('rt-text[slot="audienceScore"]')),
+            years: years
+        };
+    }"""
+    
+    # One Chromium process per headless mode, shared by all instances (contexts stay per scraper).
+    # Sync Playwright objects are bound to the thread that started them, so scrapers must
+    # be created and used on that same thread.
+    _playwright = None
+    _browsers: Dict[bool, Browser] = {}
+    _launch_lock = threading.Lock()
+    
     def __init__(self, base_url: str, robots_txt_path: str = "robots.txt", user_agent: str = "", headless: bool = True):
         super().__init__(base_url, robots_txt_path, user_agent)
         self.headless = headless
-        self.playwright = None
-        self.browser = None
         self.context = None
         self.page = None
         self._setup_playwright()
     
+    @classmethod
+    def _get_browser(cls, headless: bool) -> Browser:
+        """Launch the shared browser on first use and return it."""
+        with cls._launch_lock:
+            browser = cls._browsers.get(headless)
+            if browser is None or not browser.is_connected():
+                if cls._playwright is None:
+                    cls._playwright = sync_playwright().start()
+                    atexit.register(cls._shutdown_browser)
+                browser = cls._playwright.chromium.launch(
+                    headless=headless,
+                    args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu',
+                          '--disable-extensions', '--blink-settings=imagesEnabled=false']
+                )
+                cls._browsers[headless] = browser
+                logger.info(f"Playwright browser launched in {'headless' if headless else 'visual'} mode")
+            return browser
+    
+    @classmethod
+    def _shutdown_browser(cls):
+        """Close the shared browsers and stop Playwright (runs once at exit)."""
+        with cls._launch_lock:
+            try:
+                for browser in cls._browsers.values():
+                    browser.close()
+                if cls._playwright:
+                    cls._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Error shutting down Playwright: {e}")
+            finally:
+                cls._browsers.clear()
+                cls._playwright = None
+    
     def _setup_playwright(self):
-        """Initialize Playwright browser and context."""
+        """Create this scraper's context and page on the shared browser."""
         try:
-            self.playwright = sync_playwright().start()
-            self.browser = self.playwright.chromium.launch(
-                headless=self.headless,
-                args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
-            )
-            self.context = self.browser.new_context(user_agent=self.user_agent)
+            browser = self._get_browser(self.headless)
+            self.context = browser.new_context(user_agent=self.user_agent)
+            self.context.route("**/*", self._block_heavy_resources)
             self.page = self.context.new_page()
-            logger.info(f"Playwright initialized in {'headless' if self.headless else 'visual'} mode")
+            logger.info("Playwright context initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Playwright: {e}")
             raise
     
-    def _fetch_page(self, formatted_title: str, year: int) -> Optional[str]:
-        """Fetch page content with multiple URL patterns and search fallback."""
+    def _block_heavy_resources(self, route):
+        """Abort requests for resources the parser does not need."""
+        request = route.request
+        if (request.resource_type in self.BLOCKED_RESOURCE_TYPES
+                or any(part in request.url for part in self.BLOCKED_URL_PARTS)):
+            route.abort()
+        else:
+            route.continue_()
+    
+    def _fetch_page(self, formatted_title: str, year: int, skip_patterns: Collection[str] = ()) -> Optional[str]:
+        """
+        Fetch page content with multiple URL patterns and search fallback (skip_patterns are already ruled out).
+        Returns '' if the movie was not found and None if a navigation failed.
+        """
         try:
             if not self.page:
                 logger.error("Playwright page not initialized")
@@ -144,68 +295,87 @@ class PlaywrightScraper(BaseScraper):
                 f"m/{formatted_title}_{year}/"
             ]
             
+            navigation_failed = False
+            page_loaded = False
             for pattern in url_patterns:
+                if pattern.rstrip('/') in skip_patterns:
+                    continue
                 direct_url = urljoin(self.base_url, pattern)
-                logger.info(f"Trying: {direct_url}")
+                logger.info("Trying: %s", direct_url)
                 
                 try:
-                    self.page.goto(direct_url, wait_until='domcontentloaded', timeout=5000)
+                    self._host_limiter(urlparse(direct_url).netloc).acquire()
+                    # Return once the response starts, then wait only for the scores themselves
+                    self.page.goto(direct_url, wait_until='commit', timeout=5000)
+                    page_loaded = True
+                    try:
+                        self.page.wait_for_selector(self.SCORE_SELECTOR, state='attached', timeout=3000)
+                    except PlaywrightTimeoutError:
+                        # A slow render is not a missing scorecard: only decide once the DOM is loaded
+                        self.page.wait_for_load_state('domcontentloaded', timeout=5000)
+                        if not self.page.query_selector(self.SCORE_SELECTOR):
+                            logger.info("No scorecard on %s", direct_url)
+                            continue
                     
-                    if self._has_media_scorecard():
+                    scorecard = self._read_scorecard()
+                    if scorecard and scorecard['hasScores']:
                         logger.info("Media scorecard found on direct page")
-                        if self._check_year_match(year):
+                        if self._year_matches(scorecard['years'], year):
                             return self.page.content()
                     
                 except Exception as e:
-                    logger.info(f"Direct navigation failed: {e}")
+                    logger.info("Direct navigation failed: %s", e)
+                    navigation_failed = True
                     continue
             
-            # Fallback to search
+            # Fallback to search, from the home page unless a direct URL was loaded in this call
+            # (otherwise the page is about:blank or the previous movie's)
+            if not page_loaded:
+                try:
+                    self._host_limiter(urlparse(self.base_url).netloc).acquire()
+                    self.page.goto(self.base_url, wait_until='commit', timeout=5000)
+                except Exception as e:
+                    logger.info("Home page navigation failed: %s", e)
+                    return None
+            
             logger.info("Trying search functionality")
-            return self._search_and_extract(formatted_title, year)
+            html_content = self._search_and_extract(formatted_title, year)
+            # Not finding the movie only counts as a miss if every direct URL was actually checked
+            if html_content == "" and navigation_failed:
+                return None
+            return html_content
             
         except Exception as e:
             logger.error(f"Error in _fetch_page: {e}")
             return None
     
-    def _has_media_scorecard(self) -> bool:
-        """Check if media scorecard exists on the page."""
+    def _read_scorecard(self) -> Optional[Dict]:
+        """Get scorecard presence and metadata years from the page (None without a scorecard)."""
         try:
-            scorecard = self.page.query_selector('media-scorecard')
-            if scorecard:
-                # Check if scores are present
-                critic_score = self.page.query_selector('rt-text[slot="criticsScore"]')
-                audience_score = self.page.query_selector('rt-text[slot="audienceScore"]')
-                return critic_score and audience_score
-            return False
+            return self.page.evaluate(self.SCORECARD_SCRIPT)
         except Exception:
-            return False
+            return None
     
-    def _check_year_match(self, target_year: int) -> bool:
-        """Check if page year matches target year within tolerance."""
-        try:
-            metadata_elements = self.page.query_selector_all('rt-text[slot="metadataProp"]')
-            for element in metadata_elements:
-                text = element.inner_text()
-                if text:
-                    year_match = re.search(r'(19|20)\d{2}', text)
-                    if year_match:
-                        page_year = int(year_match.group(0))
-                        if abs(page_year - target_year) <= 3:
-                            logger.info(f"Year match: {page_year} (target: {target_year})")
-                            return True
-            return False
-        except Exception as e:
-            logger.error(f"Error checking year match: {e}")
-            return False
+    def _has_media_scorecard(self) -> bool:
+        """Check if media scorecard exists on the page."""
+        scorecard = self._read_scorecard()
+        return bool(scorecard and scorecard['hasScores'])
+    
+    def _year_matches(self, page_years, target_year: int) -> bool:
+        """Check if any page year matches target year within tolerance."""
+        for page_year in page_years:
+            if abs(page_year - target_year) <= 3:
+                logger.info("Year match: %s (target: %s)", page_year, target_year)
+                return True
+        return False
     
     def _search_and_extract(self, formatted_title: str, year: int) -> Optional[str]:
-        """Use search to find movie and extract content."""
+        """Use search to find movie and extract content ('' if no matching result, None on failure)."""
         try:
             logger.info("Using search to find movie")
             
-            # Find search input and search
-            search_input = self.page.query_selector('[data-qa="search-input"]')
+            # Find search input and search (the page may still be loading after a 'commit' navigation)
+            search_input = self.page.wait_for_selector('[data-qa="search-input"]', state='attached', timeout=5000)
             if not search_input:
                 logger.error("Search input not found")
                 return None
@@ -218,30 +388,30 @@ class PlaywrightScraper(BaseScraper):
             self.page.wait_for_selector('[data-qa="search-results"]', timeout=5000)
             first_result = self.page.query_selector('[data-qa="data-row"]')
             if not first_result:
-                logger.error("No search results found")
-                return None
+                logger.info("No search results found")
+                return ""
             
             # Check year match in search result
             year_element = first_result.query_selector('[data-qa="info-year"]')
             if year_element:
                 year_text = year_element.inner_text()
-                year_match = re.search(r'\((\d{4})\)', year_text)
+                year_match = _PAREN_YEAR_RE.search(year_text)
                 if year_match:
                     result_year = int(year_match.group(1))
                     if abs(result_year - year) <= 3:
-                        logger.info(f"Year match in search: {result_year}")
+                        logger.info("Year match in search: %s", result_year)
                         
                         # Click on result and wait for page load
                         name_element = first_result.query_selector('[data-qa="info-name"]')
                         if name_element:
                             name_element.click()
-                            self.page.wait_for_load_state('domcontentloaded', timeout=10000)
+                            self.page.wait_for_selector(self.SCORE_SELECTOR, state='attached', timeout=5000)
                             
                             if self._has_media_scorecard():
                                 logger.info("Media scorecard found after search")
                                 return self.page.content()
             
-            return None
+            return ""
             
         except Exception as e:
             logger.error(f"Error in search and extract: {e}")
@@ -256,18 +426,17 @@ class PlaywrightScraper(BaseScraper):
         raise NotImplementedError("Subclasses must implement _fetch_and_validate")
     
     def close(self):
-        """Clean up Playwright resources."""
+        """Clean up this scraper's page and context (the shared browser closes at exit)."""
         try:
             if self.page:
                 self.page.close()
             if self.context:
                 self.context.close()
-            if self.browser:
-                self.browser.close()
-            if self.playwright:
-                self.playwright.stop()
         except Exception as e:
             logger.warning(f"Error during cleanup: {e}")
+        finally:
+            # Safe to call again (atexit, __del__)
+            self.page = self.context = None
     
     def __del__(self):
         """Automatic cleanup."""
@@ -1,9 +1,12 @@
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 from urllib.parse import urljoin
 from .base_scraper import HtmlScraper, logger
 import re
 from typing import Optional, Dict
 
+_NUM_RE = re.compile(r"(\d+)")
+_NUM_COMMA_RE = re.compile(r"([\d,]+)")
+
 class MetacriticScraper(HtmlScraper):
     """
     Scraper for Metacritic movie ratings.
@@ -21,19 +24,21 @@ class MetacriticScraper(HtmlScraper):
     def _fetch_and_validate(self, formatted_title: str, year: int) -> Optional[Dict[str, int | float | None]]:
         url = urljoin(self.base_url, f"movie/{formatted_title}")
         html_content: Optional[str] = self._fetch_page(url)
+        if html_content is None:
+            return None  # Fetch failed (throttled, server error, timeout); not a miss
         if not html_content:
             return {}
         ratings = self._parse_content(html_content)
         scraped_year = int(ratings.get("year"))
 
         if scraped_year and abs(scraped_year - year) > 3: # Integrity check
-            logger.warning(f"Year mismatch for {formatted_title}: expected {year}, found {scraped_year}.")
+            logger.warning("Year mismatch for %s: expected %s, found %s.", formatted_title, year, scraped_year)
             return {}
         
         return ratings
 
     def _parse_content(self, html_content: str) -> Dict[str, int | float | None]:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        tree = LexborHTMLParser(html_content)
         ratings: Dict[str, int | float | None] = {
             "data_source": "metacritic",
             "critic_score": None,
@@ -43,37 +48,33 @@ class MetacriticScraper(HtmlScraper):
         }
 
         # Extract year
-        hero_metadata = soup.find("div", attrs={"data-testid": "hero-metadata"})
         try:
-            ratings["year"] = int(hero_metadata.find("li").find("span").text.strip()) # type: ignore
+            ratings["year"] = int(tree.css_first('div[data-testid="hero-metadata"] li span').text(strip=True)) # type: ignore
         except (AttributeError, ValueError):
             raise ValueError("Could not extract year")
         
         # Extract critic info
-        critic_info = soup.find("div", attrs={"data-testid": "critic-score-info"})
         try:
-            ratings["critic_score"] = float(critic_info.find("div", class_="c-siteReviewScore").find("span").text.strip()) # type: ignore
+            ratings["critic_score"] = float(tree.css_first('div[data-testid="critic-score-info"] div.c-siteReviewScore span').text(strip=True)) # type: ignore
         except (AttributeError, ValueError):
             ratings["critic_score"] = None
             
         try:
-            review_span = critic_info.find("a", attrs={"data-testid": "critic-path"}).get_text(strip=True)
-            match = re.search(r"(\d+)", review_span)
+            review_span = tree.css_first('div[data-testid="critic-score-info"] a[data-testid="critic-path"]').text(strip=True)
+            match = _NUM_RE.search(review_span)
             ratings["critic_count"] = int(match.group(1).replace(",", ""))
         except (AttributeError, ValueError):
             ratings["critic_count"] = None
 
         # Extract user info
-        user_info = soup.find("div", attrs={"data-testid": "user-score-info"})
-
         try:
-            ratings["user_score"] = float(user_info.find("div", class_="c-siteReviewScore").find("span").text.strip())
+            ratings["user_score"] = float(tree.css_first('div[data-testid="user-score-info"] div.c-siteReviewScore span').text(strip=True))
         except (AttributeError, ValueError):
             ratings["user_score"] = None
 
         try:
-            review_span = user_info.find("a", attrs={"data-testid": "user-path"}).get_text(strip=True)
-            match = re.search(r"([\d,]+)", review_span)
+            review_span = tree.css_first('div[data-testid="user-score-info"] a[data-testid="user-path"]').text(strip=True)
+            match = _NUM_COMMA_RE.search(review_span)
             ratings["user_count"] = int(match.group(1).replace(",", ""))
         except Exception:
             ratings["user_count"] = None
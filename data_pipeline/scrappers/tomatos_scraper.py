@@ -1,17 +1,26 @@
 # rotten_tomatoes_scraper.py
 
 from bs4 import BeautifulSoup, Tag
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+import requests
 from .base_scraper import logger, PlaywrightScraper
-from typing import Optional, Dict
+from ..utils import create_http_session
+from typing import Collection, Optional, Dict, Set
 import re
 
+_METADATA_TEXT_RE = re.compile(r'slot="metadataProp"[^>]*>([^<]*)<')
+_YEAR_RE = re.compile(r'(19|20)\d{2}')
+_NUM_RE = re.compile(r'(\d+)')
+
 class RottenTomatoesScraper(PlaywrightScraper):
     """
     Scraper for Rotten Tomatoes movie ratings using Playwright.
     """
     def __init__(self, headless: bool = True):
         super().__init__(base_url="https://www.rottentomatoes.com/", headless=headless)
+        # Plain HTTP session for server-rendered movie pages (no browser round-trip)
+        self.session = create_http_session(pool_connections=1, pool_maxsize=4, max_retries=3,
+                                           headers={"User-Agent": self.user_agent})
 
     
     def get_ratings(self, movie_title: str, year: int) -> Optional[Dict[str, int | float | None]]:
@@ -23,19 +32,76 @@ class RottenTomatoesScraper(PlaywrightScraper):
     def _fetch_and_validate(self, formatted_title: str, year: int) -> Optional[Dict[str, int | float | None]]:
         """
         Fetch page content and validate year match, then parse ratings.
+        Tries the server-rendered page over plain HTTP before falling back to the browser.
         """
-        html_content = self._fetch_page(formatted_title, year)
+        ruled_out = set()
+        ratings = self._fetch_static_ratings(formatted_title, year, ruled_out)
+        if ratings:
+            return ratings
+        
+        # The browser only retries direct URLs whose static page could still render scores
+        html_content = self._fetch_page(formatted_title, year, ruled_out)
+        if html_content is None:
+            return None  # Browser navigation failed; not a miss
         if not html_content:
             return {}
         
         ratings = self._parse_content(html_content)
         return ratings
 
-    def _fetch_page(self, formatted_title: str, year: int) -> Optional[str]:
+    def _fetch_static_ratings(self, formatted_title: str, year: int,
+                              ruled_out: Set[str]) -> Optional[Dict[str, int | float | None]]:
+        """
+        Fetch the direct movie URLs with requests and parse them if the scorecard is server-rendered.
+        Patterns that do not exist (404) or show scores for another year are added to ruled_out.
+        """
+        for pattern in (f"m/{formatted_title}", f"m/{formatted_title}_{year}"):
+            url = urljoin(self.base_url, pattern)
+            try:
+                # Shares the host's pacing with the browser navigations
+                self._host_limiter(urlparse(url).netloc).acquire()
+                logger.info("Fetching: %s", url)
+                response = self.session.get(url, timeout=10)
+            except requests.exceptions.RequestException as e:
+                logger.info("Static fetch failed: %s", e)
+                continue
+            if response.status_code == 404:
+                ruled_out.add(pattern)
+            if response.status_code != 200:
+                continue
+            
+            ratings = self._parse_content(response.text)
+            if ratings["critic_score"] is not None:
+                if self._html_year_matches(response.text, year):
+                    return ratings
+                # Rendered scores and metadata for another year; the browser would see the same page
+                if _METADATA_TEXT_RE.search(response.text):
+                    ruled_out.add(pattern)
+        return None
+
+    def _html_year_matches(self, html_content: str, target_year: int) -> bool:
+        """
+        Check the page metadata for a year within tolerance of the target year.
+        """
+        for text in _METADATA_TEXT_RE.findall(html_content):
+            year_match = _YEAR_RE.search(text)
+            if year_match and abs(int(year_match.group(0)) - target_year) <= 3:
+                return True
+        return False
+
+    def close(self):
+        """
+        Close the HTTP session and Playwright resources.
+        """
+        if getattr(self, "session", None):
+            self.session.close()
+        super().close()
+
+    def _fetch_page(self, formatted_title: str, year: int, skip_patterns: Collection[str] = ()) -> Optional[str]:
         """
         Override to match the signature expected by PlaywrightScraper.
         """
-        return super()._fetch_page(formatted_title, year)
+        return super()._fetch_page(formatted_title, year, skip_patterns)
 
     def _parse_content(self, html_content: str) -> Dict[str, int | float | None]:
         soup = BeautifulSoup(html_content, "html.parser")
@@ -63,7 +129,7 @@ class RottenTomatoesScraper(PlaywrightScraper):
             critic_link = media_scorecard.find("rt-link", attrs={"slot": "criticsReviews"})
             if isinstance(critic_link, Tag) and critic_link.text:
                 try:
-                    critic_count_match = re.search(r'(\d+)', critic_link.text.strip())
+                    critic_count_match = _NUM_RE.search(critic_link.text.strip())
                     if critic_count_match:
                         ratings["critic_count"] = int(critic_count_match.group(1))
                 except (ValueError, AttributeError) as e:
@@ -6,12 +6,20 @@ Common helper functions and utilities
 
 import json
 import logging
+import os
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
+from decimal import Decimal
 from functools import wraps
 
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 def setup_logging(name: str, level: str = 'INFO', log_file: Optional[str] = None) -> logging.Logger:
     """Set up logging for a module"""
     logger = logging.getLogger(name)
@@ -35,6 +43,100 @@ def setup_logging(name: str, level: str = 'INFO', log_file: Optional[str] = None
     
     return logger
 
+def create_http_session(pool_connections: int = 4, pool_maxsize: int = 32,
+                        max_retries: int = 3, backoff_factor: float = 0.3,
+                        headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """Create a requests session with connection pooling and retries on transient errors"""
+    session = requests.Session()
+    
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    if headers:
+        session.headers.update(headers)
+    
+    return session
+
+def load_iceberg_catalog(name: str = 'iceberg'):
+    """Load the Polaris REST catalog with pyiceberg (optional dependency, imported lazily)"""
+    from pyiceberg.catalog import load_catalog
+    
+    return load_catalog(name, **{
+        'type': 'rest',
+        'uri': f"{os.getenv('POLARIS_URL', 'http://localhost:8181')}/api/catalog",
+        'warehouse': os.getenv('ICEBERG_WAREHOUSE', 'polariscatalog'),
+        'credential': f"{os.getenv('POLARIS_CLIENT_ID', 'root')}:{os.getenv('POLARIS_CLIENT_SECRET', 'secret')}",
+        'scope': 'PRINCIPAL_ROLE:ALL',
+        's3.endpoint': f"http://{os.getenv('MINIO_HOST', 'localhost')}:{os.getenv('MINIO_PORT', '9000')}",
+        's3.access-key-id': os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
+        's3.secret-access-key': os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
+        's3.region': 'dummy-region'
+    })
+
+def _arrow_type(trino_type: str):
+    """Map a Trino column type (VARCHAR, INTEGER, BIGINT, DECIMAL(p,s), ARRAY(...), ROW(...)) to a pyarrow type"""
+    import pyarrow as pa
+    
+    if trino_type.startswith('ARRAY('):
+        return pa.list_(_arrow_type(trino_type[6:-1]))
+    if trino_type.startswith('ROW('):
+        fields = [field.split(' ', 1) for field in trino_type[4:-1].split(', ')]
+        return pa.struct([(name, _arrow_type(type_)) for name, type_ in fields])
+    if trino_type.startswith('DECIMAL('):
+        precision, scale = map(int, trino_type[8:-1].split(','))
+        return pa.decimal128(precision, scale)
+    return {'VARCHAR': pa.string(), 'INTEGER': pa.int32(), 'BIGINT': pa.int64()}[trino_type]
+
+def build_arrow_table(column_types: Sequence[Tuple[str, str]], columns: Sequence[Sequence[Any]]):
+    """Build a pyarrow Table from column-major values, coerced to the given Trino column types"""
+    import pyarrow as pa
+    
+    schema = pa.schema([(name, _arrow_type(type_)) for name, type_ in column_types])
+    arrays = []
+    for (name, type_), field, values in zip(column_types, schema, columns):
+        if type_ == 'VARCHAR':
+            # Same as the SQL path, which stringifies non-string values
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        elif type_.startswith('DECIMAL('):
+            quantum = Decimal(1).scaleb(-field.type.scale)
+            values = [None if value is None else Decimal(str(value)).quantize(quantum) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block only as long as needed to stay within the rate, then consume a token"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
 def retry_on_error(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
     """Decorator to retry functions on error"""
     def decorator(func):
@@ -80,8 +182,8 @@ def safe_json_dump(data: Any, file_path: Path, **kwargs) -> bool:
 def safe_json_load(file_path: Path) -> Optional[Any]:
     """Safely load JSON data from file with error handling"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     except Exception as e:
         print(f"❌ Error loading JSON from {file_path}: {e}")
         return None
@@ -121,12 +223,10 @@ def parse_metascore(metascore_str: Optional[str]) -> Optional[int]:
 
 def extract_year_from_date(date_str: Optional[str]) -> Optional[int]:
     """Extract year from date string"""
-    if not date_str:
-        return None
-    try:
-        return int(date_str[:4])
-    except (ValueError, TypeError):
+    # Check the prefix up front; cheaper than raising on malformed dates
+    if not isinstance(date_str, str) or not date_str[:4].isdigit():
         return None
+    return int(date_str[:4])
 
 def truncate_text(text: str, max_length: int = 1000, suffix: str = "...") -> str:
     """Truncate text to specified length"""
@@ -238,6 +338,27 @@ def merge_movie_data(base_movie: Dict[str, Any], enhancement: Dict[str, Any]) ->
     
     return merged
 
+def to_rating_rows(ratings: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """Convert OMDb Ratings entries to rows for an ARRAY(ROW(source VARCHAR, value VARCHAR)) column"""
+    if not ratings:
+        return None
+    return [{'source': rating.get('Source'), 'value': rating.get('Value')} for rating in ratings]
+
+def deduplicate_movies(movies: List[Dict[str, Any]], key: str = 'imdb_id') -> List[Dict[str, Any]]:
+    """Drop repeated movies by key, keeping the first occurrence and the original order"""
+    seen = set()
+    unique = []
+    
+    for movie in movies:
+        value = movie.get(key)
+        if value:
+            if value in seen:
+                continue
+            seen.add(value)
+        unique.append(movie)
+    
+    return unique
+
 def filter_movies_by_rating(movies: List[Dict[str, Any]], min_rating: float = 0.0, 
                            max_rating: float = 10.0) -> List[Dict[str, Any]]:
     """Filter movies by rating range"""
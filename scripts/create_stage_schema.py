@@ -95,7 +95,7 @@ class StageSchemaCreator:
             country VARCHAR,
             awards VARCHAR,
             poster VARCHAR,
-            ratings VARCHAR,
+            ratings ARRAY(ROW(source VARCHAR, value VARCHAR)),
             imdb_rating DECIMAL(10,1),
             imdb_votes INTEGER,
             metascore INTEGER,
@@ -113,6 +113,43 @@ class StageSchemaCreator:
         
         return self._execute_trino_command(create_sql, "Creating omdb_movies table")
     
+    def migrate_omdb_ratings_column(self) -> bool:
+        """Convert a pre-existing VARCHAR omdb_movies.ratings column to ARRAY(ROW(source, value))"""
+        print("Checking omdb_movies.ratings column type...")
+        
+        type_sql = f"""
+        SELECT data_type FROM {self.catalog}.information_schema.columns
+        WHERE table_schema = '{self.schema}' AND table_name = 'omdb_movies' AND column_name = 'ratings'
+        """
+        
+        try:
+            result = subprocess.run([
+                'docker', 'exec', self.container_name, 'trino',
+                '--server', self.server,
+                '--output-format', 'TSV',
+                '--execute', type_sql
+            ], capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            print("✗ Error: Checking omdb_movies.ratings column type")
+            if e.stderr:
+                print(f"Error details: {e.stderr}")
+            return False
+        
+        if not result.stdout.strip().lower().startswith('varchar'):
+            print("omdb_movies.ratings is up to date")
+            return True
+        
+        # The old text held JSON or a Python repr, which cannot be cast reliably, so the
+        # column is replaced and its values are lost; re-ingest to repopulate ratings
+        print("Warning: replacing VARCHAR omdb_movies.ratings; existing ratings values will be dropped")
+        table = f"{self.catalog}.{self.schema}.omdb_movies"
+        if not self._execute_trino_command(f"ALTER TABLE {table} DROP COLUMN ratings",
+                                           "Dropping VARCHAR ratings column"):
+            return False
+        return self._execute_trino_command(
+            f"ALTER TABLE {table} ADD COLUMN ratings ARRAY(ROW(source VARCHAR, value VARCHAR))",
+            "Adding ARRAY(ROW) ratings column")
+    
     def create_metacritic_ratings_table(self) -> bool:
         """Create Metacritic ratings table"""
         print("Creating Metacritic ratings table...")
@@ -220,6 +257,9 @@ class StageSchemaCreator:
         if not self.create_omdb_movies_table():
             return False
         
+        if not self.migrate_omdb_ratings_column():
+            return False
+        
         if not self.create_metacritic_ratings_table():
             return False
         